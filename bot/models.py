@@ -1,14 +1,15 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class NewMonitorTask:
     url: str = None
     interval: int = None
     is_url_expected: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class ModifyMonitorTask:
-    index: int = None
+    monitor_id: str = None
+    page: int = 1
     interval: int = None
 
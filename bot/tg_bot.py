@@ -1,14 +1,18 @@
+import re
+
 from telegram import Update
 from telegram.ext import (
     ApplicationBuilder,
     CallbackQueryHandler,
     CommandHandler,
+    ContextTypes,
     MessageHandler,
     filters,
 )
 
 from bot.tg_handler import TGHandler
 from constants import TG_BOT_TOKEN
+from db.db_handler import DBHandler
 from scheduler import Scheduler
 
 class TGBot:
@@ -20,18 +24,20 @@ class TGBot:
 
     def __init__(self) -> None:
         self.actions_handler: TGHandler = None
+        self.panel_buttons = {}
         self.scheduler = None
         self.bot = (
             ApplicationBuilder()
             .token(TG_BOT_TOKEN)
             .concurrent_updates(True)
-            .http_version("1.1")
+            .http_version("2")
             .get_updates_http_version("1.1")
             .post_init(self.initialize_scheduler)
             .build()
         )
 
     async def initialize_scheduler(self, application: ApplicationBuilder) -> None:
+        await DBHandler().create_indexes()
         self.scheduler = Scheduler()
         self.actions_handler = TGHandler(self.scheduler._manager._status_manager, application.bot)
         self.add_handlers()
@@ -42,31 +48,32 @@ class TGBot:
         """
         self.bot.add_handler(CommandHandler("start", self.actions_handler.start))
         self.bot.add_handler(CommandHandler("help", self.actions_handler.help))
-        self.bot.add_handler(CommandHandler("monitors", self.actions_handler.monitors))
-        self.bot.add_handler(CallbackQueryHandler(self.actions_handler.handle_buttons))
-        self.bot.add_handler(
-            MessageHandler(
-                ~filters.COMMAND
-                & filters.Regex(self.actions_handler.strings.button.panel.my_monitors),
-                self.actions_handler.monitors,
-            )
-        )
-        self.bot.add_handler(
-            MessageHandler(
-                ~filters.COMMAND
-                & filters.Regex(self.actions_handler.strings.button.panel.add_monitor),
-                self.actions_handler.add_monitor,
-            )
-        )
+        self.bot.add_handler(CommandHandler("monitors", self.actions_handler.monitors, block=False))
+        self.bot.add_handler(CallbackQueryHandler(self.actions_handler.handle_buttons, block=False))
+
+        buttons = self.actions_handler.strings.button.panel
+        self.panel_buttons = {
+            buttons.my_monitors: self.actions_handler.monitors,
+            buttons.add_monitor: self.actions_handler.add_monitor,
+            buttons.settings: self.actions_handler.notifications,
+        }
+        # \Z instead of $, which also matches before a trailing newline
+        panel_regex = re.compile(r"\A(?:" + "|".join(map(re.escape, self.panel_buttons)) + r")\Z")
         self.bot.add_handler(
             MessageHandler(
-                ~filters.COMMAND
-                & filters.Regex(self.actions_handler.strings.button.panel.settings),
-                self.actions_handler.notifications,
+                filters.TEXT & ~filters.COMMAND & filters.Regex(panel_regex),
+                self.panel_buttons_handler,
+                block=False,
             )
         )
         self.bot.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.actions_handler.user_message_handler))
 
+    async def panel_buttons_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        Dispatches the panel button press to the handler of this button.
+        """
+        await self.panel_buttons[update.message.text](update, context)
+
     def run_polling(self) -> None:
         """
         Starting the bot's polling cycle.
@@ -1,8 +1,9 @@
-import math
 import asyncio
 import json
-from collections import defaultdict
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
 
+from cachetools import TTLCache
 from telegram.ext import Application
 from telegram import (
     BotCommand,
@@ -21,6 +22,7 @@ from bot.models import NewMonitorTask, ModifyMonitorTask
 from bot.url_validator import URLValidator
 from constants import LANGUAGE_PATH
 from db.db_handler import DBHandler
+from db.models import User
 from task_manager import HTTPRequestor
 from task_manager.models import Notification
 from utils.classes import Observer
@@ -28,6 +30,18 @@ from utils.enums import ResponseStatus, SiteStatus
 from utils.functions import format_duration
 from utils.log import get_logger
 
+with open(LANGUAGE_PATH, encoding="utf-8") as language_file:
+    STRINGS: Language = Language.from_dict(json.load(language_file))  # pylint: disable=no-member
+
+MAX_MESSAGES_TO_DELETE = 8
+
+# notifications callback parameter -> DBHandler.update_user argument
+NOTIFICATIONS_FIELDS = {
+    "crash": "crash_n",
+    "recovery": "recovery_n",
+    "weekly": "weekly_n",
+}
+
 
 class TGHandler(Observer):
     """
@@ -36,43 +50,129 @@ class TGHandler(Observer):
     This class contains all the commands and message handlers for the Telegram Bot.
     """
 
-    users_tasks = {}
-    messages_to_delete = defaultdict(list)
-
     def __init__(self, event_source, bot):
         """
         Initialize the Telegram Bot handler.
-
-        Loads the language strings from a json file.
         """
         self.bot: Application = bot
         self._logger = get_logger("TGHandler")
         event_source.subscribe(self)
-        self.url_validator = URLValidator()
         self.db = DBHandler()
         self.requestor = HTTPRequestor()
-        with open(LANGUAGE_PATH, encoding="utf-8") as f:
-            self.strings: Language = Language.from_dict(  # pylint: disable=no-member
-                json.load(f)
-            )
+        self.strings: Language = STRINGS
+        # unfinished tasks are dropped after 10 minutes of inactivity of the user
+        self.users_tasks: TTLCache[int, NewMonitorTask | ModifyMonitorTask] = TTLCache(
+            maxsize=10_000, ttl=600
+        )
+        # user_id -> [lock, number of handlers holding or waiting for it]
+        self._users_locks: dict[int, list] = {}
+        # ids of the bot messages to delete on the next user's action
+        self.messages_to_delete: defaultdict[int, deque[int]] = defaultdict(
+            lambda: deque(maxlen=MAX_MESSAGES_TO_DELETE)
+        )
+        self._new_monitor_interval_keyboard = self._interval_keyboard("new-monitor")
+        self._modify_monitor_interval_keyboard = self._interval_keyboard("monitors")
+        # callback data task -> handler, parameter -> handler
+        self._buttons_handlers = {
+            "new-monitor": self._handle_new_monitor_button,
+            "monitors": self._handle_monitors_button,
+            "notifications": self._handle_notifications_button,
+        }
+        self._new_monitor_buttons_handlers = {
+            "url": self._new_monitor_url,
+            "interval": self._new_monitor_interval,
+            "interval-time": self._new_monitor_interval_time,
+            "cancel": self._new_monitor_cancel,
+            "finish": self._new_monitor_finish,
+        }
+        self._monitors_buttons_handlers = {
+            "list": self._monitors_list,
+            "delete": self._monitors_delete,
+            "modify": self._monitors_modify,
+            "interval-time": self._monitors_interval_time,
+        }
+
+    @staticmethod
+    def _interval_keyboard(task: str) -> InlineKeyboardMarkup:
+        """
+        Builds a keyboard for selecting the monitoring interval.
+
+        Args:
+            task (str): the task prefix of the buttons callback data.
+
+        Returns:
+            InlineKeyboardMarkup: keyboard with a button for each monitoring interval.
+        """
+        return InlineKeyboardMarkup(
+            [
+                [
+                    InlineKeyboardButton(
+                        f"⏳ {format_duration(seconds, full_words=True)}",
+                        callback_data=f"{task}_interval-time_{seconds}",
+                    )
+                ]
+                for seconds in MONITORING_INTERVALS
+            ]
+        )
+
+    def _get_new_monitor_task(self, user_id: int) -> NewMonitorTask:
+        """
+        Returns the user's new monitor task, creating it if the user has no such task.
+
+        Args:
+            user_id (int): Telegram user_id.
+
+        Returns:
+            NewMonitorTask: the user's new monitor task.
+        """
+        task = self.users_tasks.get(user_id)
+        if not isinstance(task, NewMonitorTask):
+            task = self.users_tasks[user_id] = NewMonitorTask()
+        return task
+
+    @asynccontextmanager
+    async def _user_lock(self, user_id: int):
+        """
+        Serializes handling of the user's updates.
+
+        The lock is removed once no handler holds or waits for it,
+        so locks of inactive users are not kept.
+
+        Args:
+            user_id (int): Telegram user_id.
+        """
+        entry = self._users_locks.get(user_id)
+        if entry is None:
+            entry = self._users_locks[user_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._users_locks[user_id]
 
     async def _delete_messages(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
-        Deletes a message from the chat.
+        Deletes the tracked bot messages from the chat with one request.
+
+        At most MAX_MESSAGES_TO_DELETE ids are tracked, well within the Bot API limit of 100 per request.
 
         Args:
             update (Update): The update object containing information about the message.
             context (ContextTypes.DEFAULT_TYPE): The context object.
         """
-        for message in self.messages_to_delete[update.effective_user.id]:
-            try:
-                await context.bot.delete_message(
-                    chat_id=update.effective_chat.id,
-                    message_id=message.message_id,
-                )
-                self.messages_to_delete.pop(update.effective_user.id)
-            except (TelegramError, KeyError):
-                pass
+        message_ids = self.messages_to_delete.pop(update.effective_user.id, None)
+        if not message_ids:
+            return
+        try:
+            await context.bot.delete_messages(
+                chat_id=update.effective_chat.id,
+                message_ids=list(message_ids),
+            )
+        except TelegramError:
+            self._logger.warning("Error when attempt to delete messages %s", list(message_ids), exc_info=True)
 
     async def notify(self, notification: Notification):
         """
@@ -87,25 +187,41 @@ class TGHandler(Observer):
         url = notification.url
         status = notification.status
 
+        if status == SiteStatus.AVAILABLE:
+            text = f"{url} заработал"
+        else:
+            text = f"{url} упал"
+
         users_ids = await self.db.get_monitor_users_by_url(url)
-        users = await asyncio.gather(*[self.db.get_user(user_id) for user_id in users_ids])
-        for user in users:
-            if user is not None:
-                if status == SiteStatus.AVAILABLE:
-                    if user.site_recovery_notifications:
-                        try:
-                            await self.bot.send_message(user._id, f"{url} заработал")
-                        except:
-                            self._logger.warning("Error when attempt to send notification to user %d", user._id, exc_info=True)    
-                        self._logger.info("User %d gets notification %s", user._id, str(notification))
-                        continue
-                if status == SiteStatus.UNAVAILABLE:
-                    if user.site_crash_notifications:
-                        try:
-                            await self.bot.send_message(user._id, f"{url} упал")
-                        except:
-                            self._logger.warning("Error when attempt to send notification to user %d", user._id, exc_info=True)
-                        self._logger.info("User %d gets notification %s", user._id, str(notification))
+        users = await self.db.get_users(users_ids) or []
+        recipients = [
+            user for user in users
+            if (
+                user.site_recovery_notifications
+                if status == SiteStatus.AVAILABLE
+                else user.site_crash_notifications
+            )
+        ]
+        results = await asyncio.gather(
+            *[self.bot.send_message(user._id, text) for user in recipients],
+            return_exceptions=True,
+        )
+        unexpected_error = None
+        for user, result in zip(recipients, results):
+            if isinstance(result, TelegramError):
+                self._logger.warning(
+                    "Error when attempt to send notification to user %d", user._id, exc_info=result
+                )
+            elif isinstance(result, BaseException):
+                self._logger.error(
+                    "Unexpected error when attempt to send notification to user %d", user._id, exc_info=result
+                )
+                unexpected_error = unexpected_error or result
+            else:
+                self._logger.info("User %d gets notification %s", user._id, str(notification))
+        # all results are logged before the first unexpected error is raised
+        if unexpected_error is not None:
+            raise unexpected_error
 
     # Command handlers
 
@@ -115,11 +231,12 @@ class TGHandler(Observer):
 
         Set the commands for the chat and send a welcome message.
         """
-        if update.effective_chat.type in ("group", "supergroup"):
+        chat = update.effective_chat
+        if chat.type in ("group", "supergroup"):
             return
 
         await self._delete_messages(update, context)
-        user_id = update.effective_chat.id
+        user_id = chat.id
         await context.bot.set_my_commands(
             [
                 BotCommand("/help", self.strings.help_command_description),
@@ -137,7 +254,7 @@ class TGHandler(Observer):
             one_time_keyboard=True,
         )
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
+            chat_id=user_id,
             text=self.strings.start_command_answer,
             reply_markup=keyboard,
         )
@@ -148,11 +265,12 @@ class TGHandler(Observer):
 
         Send a message with the bot abilities.
         """
-        if update.effective_chat.type in ("group", "supergroup"):
+        chat = update.effective_chat
+        if chat.type in ("group", "supergroup"):
             return
         await self._delete_messages(update, context)
         text = self.strings.help_command_answer
-        await context.bot.send_message(chat_id=update.effective_chat.id, text=text)
+        await context.bot.send_message(chat_id=chat.id, text=text)
 
     async def monitors(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE, page: int = 1
@@ -162,25 +280,33 @@ class TGHandler(Observer):
 
         Send a message with the user's monitors list.
         """
-        if update.effective_chat.type in ("group", "supergroup"):
+        chat = update.effective_chat
+        if chat.type in ("group", "supergroup"):
             return
         await self._delete_messages(update, context)
-        user_id = update.effective_chat.id
+        user_id = chat.id
         text=""
-        monitors_count = await self.db.get_user_monitors_count(user_id)
-        if monitors_count is None:
-            await context.bot.send_message(user_id, self.strings.some_error)
-            return
-        total_pages = math.ceil(monitors_count / ITEMS_PER_PAGE)
-        if page > total_pages:
-            page = total_pages
         if page < 1:
             page = 1
-        monitors = await self.db.get_user_monitors(
+        monitors_page = await self.db.get_user_monitors_page(
             user_id,
             skip=(page-1)*ITEMS_PER_PAGE,
             limit=ITEMS_PER_PAGE
         )
+        if monitors_page is None:
+            await context.bot.send_message(user_id, self.strings.some_error)
+            return
+        monitors, monitors_count = monitors_page
+        total_pages = (monitors_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
+        if 0 < total_pages < page:
+            # the requested page is gone (e.g. after deletion), re-read the last one
+            page = total_pages
+            monitors_page = await self.db.get_user_monitors_page(
+                user_id,
+                skip=(page-1)*ITEMS_PER_PAGE,
+                limit=ITEMS_PER_PAGE
+            )
+            monitors = monitors_page[0] if monitors_page is not None else None
         if monitors is None:
             text = self.strings.some_error
             await context.bot.send_message(user_id, text)
@@ -189,21 +315,20 @@ class TGHandler(Observer):
             await context.bot.send_message(user_id, text)
         else:
             keyboard = []
-            monitored_sites = await asyncio.gather(*[self.db.get_site(monitor.url) for monitor in monitors])
-            text = f"📊 Мои мониторы (стр. {page}/{total_pages})\n\n"
+            sites_by_url = await self.db.get_sites([monitor.url for monitor in monitors]) or {}
+            lines = []
 
             for idx, monitor in enumerate(monitors, (page-1)*ITEMS_PER_PAGE+1):
-                if monitored_sites[(idx-1)%ITEMS_PER_PAGE]:
-                    if monitored_sites[(idx-1)%ITEMS_PER_PAGE].status == SiteStatus.AVAILABLE:
-                        circle = "🟢"
-                    else:
-                        circle = "🔴"
+                site = sites_by_url.get(monitor.url)
+                if site and site.status == SiteStatus.AVAILABLE:
+                    circle = "🟢"
                 else:
                     circle = "🔴"
-                text += f"#{idx} {circle} {monitor.url} ⏳{format_duration(monitor.interval)}\n"
+                lines.append(f"#{idx} {circle} {monitor.url} ⏳{format_duration(monitor.interval)}\n")
+                # the monitor is addressed by id, so the buttons stay valid when the list changes
                 keyboard.append([
-                    InlineKeyboardButton(f"⚙️ #{idx}", callback_data=f"monitors_modify_{idx-1}"),
-                    InlineKeyboardButton(f"🗑 #{idx}", callback_data=f"monitors_delete_{idx-1}")
+                    InlineKeyboardButton(f"⚙️ #{idx}", callback_data=f"monitors_modify_{monitor._id}:{page}"),
+                    InlineKeyboardButton(f"🗑 #{idx}", callback_data=f"monitors_delete_{monitor._id}:{page}")
                 ])
 
             arrows_buttons = []
@@ -213,8 +338,10 @@ class TGHandler(Observer):
                 arrows_buttons.append(InlineKeyboardButton("➡️", callback_data=f"monitors_list_{page+1}"))
             if arrows_buttons:
                 keyboard.append(arrows_buttons)
-            self.messages_to_delete[user_id].append(
-                await context.bot.send_message(user_id, text, reply_markup=InlineKeyboardMarkup(keyboard), disable_web_page_preview=True))
+            text = f"📊 Мои мониторы (стр. {page}/{total_pages})\n\n" + "".join(lines)
+            self.messages_to_delete[user_id].append((
+                await context.bot.send_message(user_id, text, reply_markup=InlineKeyboardMarkup(keyboard), disable_web_page_preview=True)
+            ).message_id)
 
     async def add_monitor(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
@@ -222,22 +349,16 @@ class TGHandler(Observer):
 
         Send a message with the user's monitors list.
         """
-        await self._delete_messages(update, context)
-        if update.effective_chat.type in ("group", "supergroup"):
+        chat = update.effective_chat
+        if chat.type in ("group", "supergroup"):
             return
-        user_id = update.effective_chat.id
-        if user_id not in self.users_tasks:
-            self.users_tasks[user_id] = NewMonitorTask()
+        await self._delete_messages(update, context)
+        user_id = chat.id
+        task = self._get_new_monitor_task(user_id)
 
-        monitor_url = (
-            self.users_tasks[user_id].url
-            if self.users_tasks[user_id].url
-            else self.strings.not_defined
-        )
+        monitor_url = task.url if task.url else self.strings.not_defined
         monitor_interval = (
-            format_duration(self.users_tasks[user_id].interval)
-            if self.users_tasks[user_id].interval
-            else self.strings.not_defined
+            format_duration(task.interval) if task.interval else self.strings.not_defined
         )
         text = self.strings.new_monitor_task_status.format(monitor_url, monitor_interval)
 
@@ -256,7 +377,7 @@ class TGHandler(Observer):
             ],
             [InlineKeyboardButton(buttons.cancel, callback_data="new-monitor_cancel_")],
         ]
-        if self.users_tasks[user_id].interval and self.users_tasks[user_id].url:
+        if task.interval and task.url:
             keyboard.append(
                 [
                     InlineKeyboardButton(
@@ -271,7 +392,7 @@ class TGHandler(Observer):
     async def notifications(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await self._delete_messages(update, context)
         user_id = update.effective_chat.id
-        user_info = await self.db.get_user(user_id=user_id)
+        user_info = await self.db.get_user(user_id)
         if user_info is None:
             await context.bot.send_message(user_id, self.strings.some_error)
             return
@@ -281,24 +402,37 @@ class TGHandler(Observer):
                 await context.bot.send_message(user_id, self.strings.some_error)
                 return
 
+        await self._send_notifications_settings(user_id, context, user_info)
+
+    async def _send_notifications_settings(
+        self, user_id: int, context: ContextTypes.DEFAULT_TYPE, user_info: User
+    ) -> None:
+        """
+        Sends the notifications settings panel to the user.
+
+        Args:
+            user_id (int): Telegram user_id.
+            context (ContextTypes.DEFAULT_TYPE): The context object.
+            user_info (User): The user's current notifications settings.
+        """
         crash_n = user_info.site_crash_notifications
         recovery_n = user_info.site_recovery_notifications
         weekly_n = user_info.weekly_report_notifications
-        
+
         keyboard = InlineKeyboardMarkup([
             [InlineKeyboardButton(f"1️⃣ {'Выключить' if crash_n else 'Включить'}", callback_data=f"notifications_crash_{not crash_n}")],
             [InlineKeyboardButton(f"2️⃣ {'Выключить' if recovery_n else 'Включить'}", callback_data=f"notifications_recovery_{not recovery_n}")],
             [InlineKeyboardButton(f"3️⃣ {'Выключить' if weekly_n else 'Включить'}", callback_data=f"notifications_weekly_{not weekly_n}")],
         ])
 
-        self.messages_to_delete[user_id].append(await context.bot.send_message(
-            user_id, 
+        self.messages_to_delete[user_id].append((await context.bot.send_message(
+            user_id,
             text=self.strings.notifications_settings.format(
                 "✅" if crash_n else "❌",
                 "✅" if recovery_n else "❌",
                 "✅" if weekly_n else "❌"
                 ),
-            reply_markup=keyboard))
+            reply_markup=keyboard)).message_id)
 
 
     async def user_message_handler(
@@ -309,24 +443,26 @@ class TGHandler(Observer):
         """
         if update.effective_chat.type in ("group", "supergroup"):
             return
-        await self._delete_messages(update, context)
         user_id = update.effective_user.id
-        if self.users_tasks.get(user_id, None):
-            user_task = self.users_tasks[update.effective_user.id]
+        await self._delete_messages(update, context)
+        async with self._user_lock(user_id):
+            user_task = self.users_tasks.get(user_id)
             match user_task:
                 case NewMonitorTask() if user_task.is_url_expected:
                     url = update.message.text
-                    is_valid, description = self.url_validator.validate_url(url)
-                    if is_valid:
-                        if await self.db.check_user_monitors_for_url(user_id, url):
-                            await context.bot.send_message(user_id, self.strings.new_monitor_existing_url)
-                            return
-                        self.users_tasks[update.effective_user.id].url = url
-                        self.users_tasks[user_id].is_url_expected = False
-                        await self.add_monitor(update, context)
-                    else:
+                    is_valid, description = URLValidator.validate_url(url)
+                    if not is_valid:
                         text = self.strings.new_monitor_wrong_url.format(description)
                         await context.bot.send_message(user_id, text)
+                        return
+                    if await self.db.check_user_monitors_for_url(user_id, url):
+                        await context.bot.send_message(user_id, self.strings.new_monitor_existing_url)
+                        return
+                    user_task.url = url
+                    user_task.is_url_expected = False
+                case _:
+                    return
+        await self.add_monitor(update, context)
 
 
     # callback handlers
@@ -335,183 +471,181 @@ class TGHandler(Observer):
     ) -> None:
         """
         Handle button press events.
+
+        The callback data has the `<task>_<parameter>_<value>` format.
         """
         user_id = update.effective_user.id
+        task, parameter, value = update.callback_query.data.split("_", 2)
+        if handler := self._buttons_handlers.get(task):
+            await handler(update, context, user_id, parameter, value)
+
+    async def _handle_new_monitor_button(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parameter: str, value: str
+    ) -> None:
+        """
+        Handle the new monitor menu buttons.
+        """
+        await update.callback_query.answer()
+        if handler := self._new_monitor_buttons_handlers.get(parameter):
+            await handler(update, context, user_id, value)
+
+    async def _new_monitor_url(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, value: str
+    ) -> None:
+        self._get_new_monitor_task(user_id).is_url_expected = True
+        await update.callback_query.edit_message_text(
+            text="Введите URL", reply_markup=None
+        )
+
+    async def _new_monitor_interval(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, value: str
+    ) -> None:
+        text = "Выберите интервал"
+        await update.callback_query.edit_message_text(text=text, reply_markup=self._new_monitor_interval_keyboard)
+
+    async def _new_monitor_interval_time(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, value: str
+    ) -> None:
+        self._get_new_monitor_task(user_id).interval = int(value)
+        await update.callback_query.message.delete()
+        await self.add_monitor(update, context)
+
+    async def _new_monitor_cancel(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, value: str
+    ) -> None:
+        self.users_tasks.pop(user_id, None)
+        await update.callback_query.message.delete()
+
+    async def _new_monitor_finish(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, value: str
+    ) -> None:
+        query = update.callback_query
+        # popping the task is atomic, so a concurrent finish gets nothing;
+        # no lock is held over the request to the site
+        task: NewMonitorTask = self.users_tasks.pop(user_id, None)
+        if not task:
+            return
+        response_data = await self.requestor.make_request(task.url)
+        site_status = (
+            SiteStatus.AVAILABLE
+            if response_data.status == ResponseStatus.OK
+            else SiteStatus.UNAVAILABLE
+        )
+        check_record = response_data.prepare_for_database()
+        site_saved, monitor_id, check_id = await asyncio.gather(
+            self.db.upsert_site(task.url, site_status.value),
+            self.db.add_monitor(user_id, task.url, task.interval),
+            self.db.add_check_record(check_record),
+        )
+        if not site_saved:
+            self._logger.warning(
+                "Error writing the site %s to the database.",
+                task.url,
+            )
+        if not check_id:
+            self._logger.warning(
+                "Error writing the check %s to the database.",
+                check_record,
+            )
+        if not monitor_id:
+            self._logger.error(
+                "Error writing the monitor (url: %s, interval: %s) to the database for user %d",
+                task.url,
+                task.interval,
+                user_id,
+            )
+            self.users_tasks[user_id] = task
+            await query.edit_message_text(
+                text=self.strings.some_error, reply_markup=None)
+        else:
+            self._logger.info(
+                "User %d adds monitor %s with interval %s",
+                user_id,
+                task.url,
+                task.interval,
+            )
+            await query.edit_message_text(
+                text=self.strings.new_monitor_task_success, reply_markup=None)
+
+    async def _handle_monitors_button(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parameter: str, value: str
+    ) -> None:
+        """
+        Handle the monitors list buttons.
+        """
+        if handler := self._monitors_buttons_handlers.get(parameter):
+            await handler(update, context, user_id, value)
+
+    async def _monitors_list(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, value: str
+    ) -> None:
+        await update.callback_query.delete_message()
+        await self.monitors(update, context, int(value))
+
+    async def _monitors_delete(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, value: str
+    ) -> None:
+        query = update.callback_query
+        monitor_id, _, page = value.partition(":")
+        page = int(page or 1)
+        deleted_url = await self.db.delete_user_monitor(user_id, monitor_id)
+        await query.answer(
+            text=(
+                self.strings.delete_monitor_success.format(deleted_url)
+                if deleted_url
+                else self.strings.some_error
+            ),
+            show_alert=True
+        )
+        await query.delete_message()
+        await self.monitors(update, context, page=page)
+
+    async def _monitors_modify(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, value: str
+    ) -> None:
+        monitor_id, _, page = value.partition(":")
+        self.users_tasks[user_id] = ModifyMonitorTask(monitor_id, int(page or 1))
+        text = "Выберите интервал"
+        await update.callback_query.edit_message_text(text=text, reply_markup=self._modify_monitor_interval_keyboard)
+
+    async def _monitors_interval_time(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, value: str
+    ) -> None:
         query = update.callback_query
+        seconds = int(value)
+        task = self.users_tasks.pop(user_id, None)
+        page = task.page if isinstance(task, ModifyMonitorTask) else 1
+        updated_url = None
+        if isinstance(task, ModifyMonitorTask):
+            updated_url = await self.db.update_user_monitor(user_id, task.monitor_id, seconds)
+        if updated_url:
+            await query.answer(
+                text=self.strings.update_monitor_success.format(updated_url),
+                show_alert=True
+            )
+        else:
+            await query.answer(
+                text=self.strings.some_error,
+                show_alert=True
+            )
+        await query.delete_message()
+        await self.monitors(update, context, page=page)
 
-        callback_msg = query.data
-        task, parameter, value = callback_msg.split("_")
-        match task:
-            case "new-monitor":
-                await query.answer()
-                match parameter:
-                    case "url":
-                        self.users_tasks[user_id].is_url_expected = True
-                        await query.edit_message_text(
-                            text="Введите URL", reply_markup=None
-                        )
-
-                    case "interval":
-                        text = "Выберите интервал"
-                        keyboard = InlineKeyboardMarkup(
-                            [
-                                [
-                                    InlineKeyboardButton(
-                                        f"⏳ {format_duration(seconds, full_words=True)}",
-                                        callback_data=f"new-monitor_interval-time_{seconds}",
-                                    )
-                                ]
-                                for seconds in MONITORING_INTERVALS
-                            ]
-                        )
-                        await query.edit_message_text(text=text, reply_markup=keyboard)
-                    case "interval-time":
-                        self.users_tasks[user_id].interval = int(value)
-                        await query.message.delete()
-                        await self.add_monitor(update, context)
-
-                    case "cancel":
-                        self.users_tasks.pop(update.effective_user.id)
-                        await query.message.delete()
-
-                    case "finish":
-                        task: NewMonitorTask = self.users_tasks.pop(user_id, None)
-                        if task:
-                            response_data = await self.requestor.make_request(task.url)
-                            site_status = (
-                                SiteStatus.AVAILABLE
-                                if response_data.status == ResponseStatus.OK
-                                else SiteStatus.UNAVAILABLE
-                            )
-                            if await self.db.get_site(task.url) is None:
-                                if not await self.db.add_site(task.url, site_status.value):
-                                    self._logger.warning(
-                                        "Error writing the site %s to the database.",
-                                        task.url,
-                                    )
-                            if not await self.db.add_monitor(
-                                user_id, task.url, task.interval
-                            ):
-                                self._logger.error(
-                                    "Error writing the monitor (url: %s, interval: %s) to the database for user %d",
-                                    task.url,
-                                    task.interval,
-                                    user_id,
-                                )
-                                self.users_tasks[user_id] = task
-                                await query.edit_message_text(
-                                    text=self.strings.some_error, reply_markup=None)
-                            else:
-                                self._logger.info(
-                                    "User %d adds monitor %s with interval %s",
-                                    user_id,
-                                    task.url,
-                                    task.interval,
-                                )
-                                await query.edit_message_text(
-                                    text=self.strings.new_monitor_task_success, reply_markup=None)
-                            if not await self.db.add_check_record(
-                                response_data.prepare_for_database()
-                            ):
-                                self._logger.warning(
-                                    "Error writing the check %s to the database.",
-                                    response_data.prepare_for_database(),
-                                )
-            case "monitors":
-                match parameter:
-                    case "list":
-                        await query.delete_message()
-                        await self.monitors(update, context, int(value))
-                    
-                    case "delete":
-                        monitor = (await self.db.get_user_monitors(user_id, skip=int(value), limit=1))[0]
-                        if monitor:
-                            if await self.db.delete_monitor(user_id, monitor.url):
-                                query.answer(
-                                    text=self.strings.delete_monitor_success.format(monitor.url),
-                                    show_alert=True
-                                )
-                            else:
-                                query.answer(
-                                text=self.strings.some_error,
-                                show_alert=True
-                            )
-                        else:
-                            query.answer(
-                                text=self.strings.some_error,
-                                show_alert=True
-                            )
-                        await query.delete_message()
-                        await self.monitors(update, context, page = math.floor(int(value)/ITEMS_PER_PAGE)+1)
-                    
-                    case "modify":
-                        # await query.delete_message()
-                        self.users_tasks[user_id] = ModifyMonitorTask(int(value))
-                        text = "Выберите интервал"
-                        keyboard = InlineKeyboardMarkup(
-                            [
-                                [
-                                    InlineKeyboardButton(
-                                        f"⏳ {format_duration(seconds, full_words=True)}",
-                                        callback_data=f"monitors_interval-time_{seconds}",
-                                    )
-                                ]
-                                for seconds in MONITORING_INTERVALS
-                            ]
-                        )
-                        await query.edit_message_text(text=text, reply_markup=keyboard)
-                    
-                    case "interval-time":
-                        seconds = int(value)
-                        task = self.users_tasks[user_id]
-                        monitor = (await self.db.get_user_monitors(user_id, skip=task.index, limit=1))[0]
-                        if monitor:
-                            if await self.db.update_monitor(user_id, monitor.url, seconds):
-                                await query.answer(
-                                text=self.strings.update_monitor_success.format(monitor.url),
-                                show_alert=True
-                            )
-                            else:
-                                await query.answer(
-                                text=self.strings.some_error,
-                                show_alert=True
-                            )
-                        else:
-                            await query.answer(
-                                text=self.strings.some_error,
-                                show_alert=True
-                            )
-                        await query.delete_message()
-                        await self.monitors(update, context, page = math.floor(int(value)/ITEMS_PER_PAGE)+1)
-            
-            case "notifications":
-                match parameter:
-                    case "crash":
-                        if value == "True":
-                            result = await self.db.update_user(user_id, crash_n=True)
-                        else:
-                            result = await self.db.update_user(user_id, crash_n=False)
-                        if result:
-                            await query.answer(self.strings.successful_changes, show_alert=True)
-                        else:
-                            await query.answer(self.strings.some_error, show_alert=True)
-                    case "recovery":
-                        if value == "True":
-                            result = await self.db.update_user(user_id, recovery_n=True)
-                        else:
-                            result = await self.db.update_user(user_id, recovery_n=False)
-                        if result:
-                            await query.answer(self.strings.successful_changes, show_alert=True)
-                        else:
-                            await query.answer(self.strings.some_error, show_alert=True)
-                    case "weekly":
-                        if value == "True":
-                            result = await self.db.update_user(user_id, weekly_n=True)
-                        else:
-                            result = await self.db.update_user(user_id, weekly_n=False)
-                        if result:
-                            await query.answer(self.strings.successful_changes, show_alert=True)
-                        else:
-                            await query.answer(self.strings.some_error, show_alert=True)
-
-                await self.notifications(update, context)
\ No newline at end of file
+    async def _handle_notifications_button(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parameter: str, value: str
+    ) -> None:
+        """
+        Handle the notifications settings buttons.
+        """
+        query = update.callback_query
+        field = NOTIFICATIONS_FIELDS.get(parameter)
+        user_info = None
+        if field:
+            user_info = await self.db.update_user(user_id, **{field: value == "True"})
+        if not user_info:
+            await query.answer(self.strings.some_error, show_alert=True)
+            await self.notifications(update, context)
+            return
+        await query.answer(self.strings.successful_changes, show_alert=True)
+        await self._delete_messages(update, context)
+        await self._send_notifications_settings(user_id, context, user_info)
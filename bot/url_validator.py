@@ -2,8 +2,50 @@ import ipaddress
 import re
 from urllib.parse import urlparse
 
+# Классы байтов для посимвольной проверки доменного имени
+_INVALID, _ALNUM, _HYPHEN, _DOT = range(4)
+_DOMAIN_CHAR_CLASS = bytes(
+    _DOT if byte == ord(".")
+    else _HYPHEN if byte == ord("-")
+    else _ALNUM if ord("0") <= byte <= ord("9") or ord("a") <= (byte | 0x20) <= ord("z")
+    else _INVALID
+    for byte in range(256)
+)
+
+_FORBIDDEN_DOMAINS: frozenset[str] = frozenset({
+    "localhost",
+    "localhost.localdomain",
+    "0.0.0.0",
+    "broadcasthost",
+})
+
+_ALLOWED_SCHEMES: frozenset[str] = frozenset({"http", "https"})
+
+_FORBIDDEN_PORTS: frozenset[int] = frozenset({
+    22,  # SSH
+    23,  # Telnet
+    25,  # SMTP
+    53,  # DNS
+    110,  # POP3
+    143,  # IMAP
+    993,  # IMAPS
+    995,  # POP3S
+    1433,  # MSSQL
+    3306,  # MySQL
+    5432,  # PostgreSQL
+    6379,  # Redis
+    27017,  # MongoDB
+})
+
 
 class URLValidator:
+    """
+    Validator of URLs suggested by users for monitoring.
+
+    The validation is purely syntactic (no DNS lookups or network requests),
+    so it is cheap enough to be called directly from async handlers.
+    """
+
     forbidden_ip_ranges = [
         ipaddress.IPv4Network("127.0.0.0/8"),  # Loopback
         ipaddress.IPv4Network("10.0.0.0/8"),  # Private Class A
@@ -17,44 +59,48 @@ class URLValidator:
         ipaddress.IPv6Network("fe80::/10"),  # IPv6 link-local
     ]
 
-    forbidden_domains = {
-        "localhost",
-        "localhost.localdomain",
-        "0.0.0.0",
-        "broadcasthost",
+    # (network address as int, netmask as int, network) for each IP version
+    forbidden_ip_masks = {
+        4: [
+            (int(network.network_address), int(network.netmask), network)
+            for network in forbidden_ip_ranges
+            if network.version == 4
+        ],
+        6: [
+            (int(network.network_address), int(network.netmask), network)
+            for network in forbidden_ip_ranges
+            if network.version == 6
+        ],
     }
 
-    forbidden_domain_patterns = [
-        r".*\.local$",  # .local домены
-        r".*\.localhost$",  # .localhost домены
-        r".*\.internal$",  # .internal домены
-        r".*\.corp$",  # .corp домены
-        r".*\.lan$",  # .lan домены
-        r".*\.intranet$",  # .intranet домены
-    ]
-
-    allowed_schemes = {"http", "https"}
-
-    forbidden_ports = {
-        22,  # SSH
-        23,  # Telnet
-        25,  # SMTP
-        53,  # DNS
-        110,  # POP3
-        143,  # IMAP
-        993,  # IMAPS
-        995,  # POP3S
-        1433,  # MSSQL
-        3306,  # MySQL
-        5432,  # PostgreSQL
-        6379,  # Redis
-        27017,  # MongoDB
-    }
+    forbidden_domain_pattern = re.compile(
+        r"\.(?:"
+        r"local"  # .local домены
+        r"|localhost"  # .localhost домены
+        r"|internal"  # .internal домены
+        r"|corp"  # .corp домены
+        r"|lan"  # .lan домены
+        r"|intranet"  # .intranet домены
+        r")$"
+    )
+
+    # Все подозрительные паттерны ищутся за один проход без приведения URL к нижнему регистру
+    suspicious_pattern = re.compile(
+        r"[@"  # Наличие @ (возможная попытка обхода)
+        r"<>\"']"  # Потенциальные XSS символы
+        r"|\.\./"  # Directory traversal
+        r"|file://"  # File protocol
+        r"|ftp://"  # FTP protocol
+        r"|javascript:"  # JavaScript protocol
+        r"|data:",  # Data protocol
+        re.IGNORECASE | re.ASCII,
+    )
 
     max_url_length = 2048
 
 
-    def validate_url(self, url: str) -> tuple[bool, str]:
+    @staticmethod
+    def validate_url(url: str) -> tuple[bool, str]:
         """
         Основная функция валидации URL
 
@@ -65,34 +111,43 @@ class URLValidator:
             if not url or not isinstance(url, str):
                 return False, "URL не может быть пустым"
 
-            if len(url) > self.max_url_length:
+            url = url.strip()
+            if len(url) > URLValidator.max_url_length:
                 return (
                     False,
-                    f"URL слишком длинный (максимум {self.max_url_length} символов)",
+                    f"URL слишком длинный (максимум {URLValidator.max_url_length} символов)",
+                )
+
+            # Дешевая проверка схемы до разбора URL; urlparse сам приводит
+            # схему и имя хоста к нижнему регистру
+            if not url[:8].lower().startswith(("http://", "https://")):
+                return (
+                    False,
+                    f"Разрешены только схемы: {', '.join(_ALLOWED_SCHEMES)}",
                 )
 
             try:
-                parsed = urlparse(url.lower().strip())
+                parsed = urlparse(url)
             except Exception:
                 return False, "Некорректный формат URL"
 
-            if parsed.scheme not in self.allowed_schemes:
+            if parsed.scheme not in _ALLOWED_SCHEMES:
                 return (
                     False,
-                    f"Разрешены только схемы: {', '.join(self.allowed_schemes)}",
+                    f"Разрешены только схемы: {', '.join(_ALLOWED_SCHEMES)}",
                 )
 
             if not parsed.hostname:
                 return False, "URL должен содержать имя хоста"
 
-            if parsed.port and parsed.port in self.forbidden_ports:
+            if parsed.port and parsed.port in _FORBIDDEN_PORTS:
                 return False, f"Порт {parsed.port} запрещен"
 
-            domain_valid, domain_error = self._validate_domain(parsed.hostname)
+            domain_valid, domain_error = URLValidator._validate_domain(parsed.hostname)
             if not domain_valid:
                 return False, domain_error
 
-            suspicious_valid, suspicious_error = self._check_suspicious_patterns(url)
+            suspicious_valid, suspicious_error = URLValidator._check_suspicious_patterns(url)
             if not suspicious_valid:
                 return False, suspicious_error
 
@@ -101,27 +156,35 @@ class URLValidator:
         except Exception as e:
             return False, f"Ошибка валидации: {str(e)}"
 
-    def _validate_domain(self, hostname: str) -> tuple[bool, str]:
-        """Валидация домена или IP адреса"""
-        if hostname.lower() in self.forbidden_domains:
+    @staticmethod
+    def _validate_domain(hostname: str) -> tuple[bool, str]:
+        """
+        Валидация домена или IP адреса.
+
+        Имя хоста приходит из urlparse уже в нижнем регистре. Имена с не-ASCII
+        символами (в том числе похожими на латиницу) отклоняются проверкой
+        доменного имени, поэтому сравнение с запрещенными доменами идет по ASCII.
+        """
+        if hostname in _FORBIDDEN_DOMAINS:
             return False, f"Домен '{hostname}' запрещен"
 
-        for pattern in self.forbidden_domain_patterns:
-            if re.match(pattern, hostname.lower()):
-                return False, f"Домен '{hostname}' соответствует запрещенному паттерну"
+        if URLValidator.forbidden_domain_pattern.search(hostname):
+            return False, f"Домен '{hostname}' соответствует запрещенному паттерну"
 
         try:
             ip = ipaddress.ip_address(hostname)
-            return self._validate_ip_address(ip)
+            return URLValidator._validate_ip_address(ip)
         except ValueError:
-            return self._validate_domain_name(hostname)
+            return URLValidator._validate_domain_name(hostname)
 
+    @staticmethod
     def _validate_ip_address(
-        self, ip: ipaddress.IPv4Address | ipaddress.IPv6Address
+        ip: ipaddress.IPv4Address | ipaddress.IPv6Address
     ) -> tuple[bool, str]:
         """Валидация IP адреса"""
-        for forbidden_range in self.forbidden_ip_ranges:
-            if ip in forbidden_range:
+        ip_int = int(ip)
+        for network_int, netmask_int, forbidden_range in URLValidator.forbidden_ip_masks[ip.version]:
+            if ip_int & netmask_int == network_int:
                 return (
                     False,
                     f"IP адрес {ip} находится в запрещенном диапазоне ({forbidden_range})",
@@ -136,7 +199,8 @@ class URLValidator:
 
         return True, "IP адрес корректен"
 
-    def _validate_domain_name(self, domain: str) -> tuple[bool, str]:
+    @staticmethod
+    def _validate_domain_name(domain: str) -> tuple[bool, str]:
         """Валидация доменного имени"""
         if len(domain) > 253:
             return False, "Доменное имя слишком длинное"
@@ -144,34 +208,41 @@ class URLValidator:
         if domain.startswith("-") or domain.endswith("-"):
             return False, "Доменное имя не может начинаться или заканчиваться дефисом"
 
-        domain_pattern = r"^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*$"
-        if not re.match(domain_pattern, domain):
+        # Один проход по байтам: метка состоит из букв, цифр и дефисов,
+        # начинается и заканчивается буквой или цифрой
+        label_len = 0
+        dot_count = 0
+        prev_class = _DOT
+        for byte in domain.encode("ascii", "replace"):
+            char_class = _DOMAIN_CHAR_CLASS[byte]
+            if char_class == _ALNUM:
+                label_len += 1
+            elif char_class == _DOT:
+                if prev_class != _ALNUM:
+                    return False, "Некорректный формат доменного имени"
+                label_len = 0
+                dot_count += 1
+            elif char_class == _HYPHEN and prev_class != _DOT:
+                label_len += 1
+            else:
+                return False, "Некорректный формат доменного имени"
+
+            if label_len > 63:
+                return False, "Часть доменного имени не может быть длиннее 63 символов"
+            prev_class = char_class
+
+        if prev_class != _ALNUM:
             return False, "Некорректный формат доменного имени"
 
-        parts = domain.split(".")
-        if len(parts) < 2:
+        if not dot_count:
             return False, "Домен должен содержать домен верхнего уровня"
 
-        for part in parts:
-            if len(part) > 63:
-                return False, "Часть доменного имени не может быть длиннее 63 символов"
-
         return True, "Доменное имя корректно"
 
-    def _check_suspicious_patterns(self, url: str) -> tuple[bool, str]:
+    @staticmethod
+    def _check_suspicious_patterns(url: str) -> tuple[bool, str]:
         """Проверка на подозрительные паттерны в URL"""
-        suspicious_patterns = [
-            r".*@.*",  # Наличие @ (возможная попытка обхода)
-            r".*\.\./.*",  # Directory traversal
-            r'.*[<>"\'].*',  # Потенциальные XSS символы
-            r".*file://.*",  # File protocol
-            r".*ftp://.*",  # FTP protocol
-            r".*javascript:.*",  # JavaScript protocol
-            r".*data:.*",  # Data protocol
-        ]
-
-        for pattern in suspicious_patterns:
-            if re.match(pattern, url.lower()):
-                return False, "URL содержит подозрительные элементы"
+        if URLValidator.suspicious_pattern.search(url):
+            return False, "URL содержит подозрительные элементы"
 
         return True, "URL не содержит подозрительных паттернов"
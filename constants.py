@@ -5,8 +5,11 @@ from pathlib import Path
 load_dotenv(override=True)
 
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "5"))
+RESPONSE_TIMEOUT = int(os.getenv("RESPONSE_TIMEOUT", "30"))
 TICK_DURATION = int(os.getenv("TICK_DURATION", "10"))
 FAILURE_THRESHOLD = int(os.getenv("FAILURE_THRESHOLD", "3"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "500"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
 LOGS_DIR = Path(os.getenv("LOGS_DIR", "/data/logs/"))
 LANGUAGE_PATH = Path(os.getenv("LANGUAGE_PATH", "/data/language.json"))
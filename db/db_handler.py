@@ -1,13 +1,33 @@
-from datetime import datetime
+from collections.abc import AsyncIterator
+from datetime import date, datetime
 from urllib.parse import urlparse
 
 import pymongo
+from bson import ObjectId
 
 from db.models import Site, Monitor, Check, User
+from utils.enums import ResponseStatus
 from constants import MONGO_URI
-from utils.decorators import Singleton
+from utils.decorators import Singleton, async_ttl_cache
 from utils.meta import ExceptionHandlingMeta
 
+USER_PROJECTION = {
+    "site_crash_notifications": 1,
+    "site_recovery_notifications": 1,
+    "weekly_report_notifications": 1,
+}
+SITE_PROJECTION = {"url": 1, "status": 1, "consecutive_failures": 1}
+MONITOR_PROJECTION = {"user_id": 1, "url": 1, "interval": 1}
+CHECK_PROJECTION = {"url": 1, "status": 1, "timestamp": 1, "code": 1, "response_time": 1}
+# enough to detect incidents and their reasons
+CHECK_STATUS_PROJECTION = {"url": 1, "status": 1, "timestamp": 1, "code": 1}
+
+# response time of a successful check, null for other checks and checks without response time
+_SUCCESSFUL_RESPONSE_TIME = {"$cond": [
+    {"$and": [{"$eq": ["$status", ResponseStatus.OK.value]}, {"$gt": ["$response_time", 0]}]},
+    "$response_time",
+    None,
+]}
 
 @Singleton
 class DBHandler(metaclass=ExceptionHandlingMeta):
@@ -15,79 +35,210 @@ class DBHandler(metaclass=ExceptionHandlingMeta):
     Singleton Adapter for database.
     """
 
+    # Hot path methods, errors are handled once per tick by the callers
+    _no_wrap = frozenset({
+        "add_check_records",
+        "get_monitors_urls_for_tick",
+        "get_monitor_users_by_url",
+    })
+
     def __init__(self):
         parsed_uri = urlparse(MONGO_URI)
-        self._client = pymongo.AsyncMongoClient(parsed_uri.hostname, parsed_uri.port, timeoutMS=2000)
+        self._client = pymongo.AsyncMongoClient(
+            parsed_uri.hostname,
+            parsed_uri.port,
+            timeoutMS=2000,
+            maxPoolSize=64,
+            minPoolSize=8,
+            maxIdleTimeMS=60_000,
+            compressors="zlib",
+        )
         self._db = self._client.monitoring_bot
+        # attribute access on the database builds a new Collection object each time,
+        # so the collections are created once and reused by every query
+        self._users = self._db.users
+        self._sites = self._db.sites
+        self._monitors = self._db.monitors
+        self._checks = self._db.checks
+        # checks are written every tick and losing a single one is acceptable,
+        # so they are inserted without waiting for the server acknowledgement
+        self._checks_unacked = self._db.get_collection(
+            "checks", write_concern=pymongo.WriteConcern(w=0)
+        )
+        # interval -> URLs of monitors with that interval, loaded on the first tick
+        self._schedule: dict[int, set[str]] | None = None
+        # incremented on every monitors change to drop a schedule loaded before it
+        self._schedule_version = 0
+
+    def _invalidate_schedule(self) -> None:
+        """
+        Drops the in-memory monitors schedule after a change of monitors.
+        It will be reloaded from the database on the next tick.
+        """
+        self._schedule = None
+        self._schedule_version += 1
 
+    async def _load_schedule(self) -> dict[int, set[str]]:
+        """
+        Loads the monitors schedule from the database.
+
+        Returns:
+            dict[int, set[str]]: interval in seconds -> URLs of monitors with this interval.
+        """
+        version = self._schedule_version
+        schedule: dict[int, set[str]] = {}
+        async for monitor_record in self._monitors.find({}, {"_id": 0, "url": 1, "interval": 1}):
+            schedule.setdefault(monitor_record["interval"], set()).add(monitor_record["url"])
+        if version == self._schedule_version:
+            self._schedule = schedule
+        return schedule
+
+    async def create_indexes(self) -> None:
+        """
+        Creates the indexes used by the queries of the handler. Existing indexes are left as is.
+        """
+        await self._monitors.create_indexes([
+            pymongo.IndexModel([("user_id", pymongo.ASCENDING), ("url", pymongo.ASCENDING)], unique=True),
+            pymongo.IndexModel("url"),
+            pymongo.IndexModel("interval"),
+        ])
+        await self._checks.create_index([("url", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)])
+        await self._sites.create_index("url", unique=True)
+
+    @async_ttl_cache()
     async def get_user(self, user_id: int) -> User:
-        print(user_id)
-        result = await self._db.users.find_one({"_id": user_id})
-        print(result)
+        result = await self._users.find_one({"_id": user_id}, USER_PROJECTION)
         if result is None:
             return False
         return User(**result)
 
+    async def get_users(self, user_ids: list[int]) -> list[User]:
+        """
+        Gets several users notification settings from database in one query.
+
+        Args:
+            user_ids (list[int]): Telegram users ids.
+
+        Returns:
+            list[User]: List of found users. Users without records are omitted.
+        """
+        return [User(**user_record) for user_record in
+                await self._users.find({"_id": {"$in": user_ids}}, USER_PROJECTION).to_list()]
+
     async def add_user(self, user_id: int, crash_n=True, recovery_n=True, weekly_n=True) -> User:
-        result = await self._db.users.insert_one({
-            "_id": user_id, 
-            "site_crash_notifications": crash_n, 
+        """
+        Adds a user with the given notification settings.
+
+        Args:
+            user_id (int): Telegram user_id.
+            crash_n (bool, optional): Notifications about sites crashes.
+            recovery_n (bool, optional): Notifications about sites recoveries.
+            weekly_n (bool, optional): Weekly reports.
+
+        Returns:
+            User: The added user.
+        """
+        user_record = {
+            "_id": user_id,
+            "site_crash_notifications": crash_n,
+            "site_recovery_notifications": recovery_n,
+            "weekly_report_notifications": weekly_n,
+        }
+        await self._users.insert_one(user_record)
+        self.get_user.cache_pop(user_id)
+        return User(**user_record)
+
+    async def update_user(self, user_id: int, crash_n=None, recovery_n=None, weekly_n=None) -> User | None:
+        """
+        Updates user`s notification settings. Settings with `None` value are left unchanged.
+
+        Args:
+            user_id (int): Telegram user_id.
+            crash_n (bool, optional): Notifications about sites crashes.
+            recovery_n (bool, optional): Notifications about sites recoveries.
+            weekly_n (bool, optional): Weekly reports.
+
+        Returns:
+            User|None: User with updated settings or `None` if there is no such user.
+        """
+        fields = {
+            "site_crash_notifications": crash_n,
             "site_recovery_notifications": recovery_n,
-            "weekly_report_notifications": weekly_n
-        })
+            "weekly_report_notifications": weekly_n,
+        }
+        updates = {field: value for field, value in fields.items() if value is not None}
+        if not updates:
+            return await self.get_user(user_id) or None
+        result = await self._users.find_one_and_update(
+            {"_id": user_id},
+            {"$set": updates},
+            projection=USER_PROJECTION,
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+        self.get_user.cache_pop(user_id)
         if result is None:
-            return False
-        return User(**result.inserted_id)
-    
-    async def update_user(self, user_id: int, crash_n=None, recovery_n=None, weekly_n=None):
-        if crash_n is not None:
-            return (await self._db.users.update_one({"_id": user_id}, {"$set": {"site_crash_notifications": crash_n}})).modified_count
-        if recovery_n is not None:
-            return (await self._db.users.update_one({"_id": user_id}, {"$set": {"site_recovery_notifications": recovery_n}})).modified_count
-        if weekly_n is not None:
-            return (await self._db.users.update_one({"_id": user_id}, {"$set": {"weekly_report_notifications": weekly_n}})).modified_count
+            return None
+        return User(**result)
 
-    async def get_site(self, url: str) -> Site | None:
+    async def get_sites(self, urls: list[str]) -> dict[str, Site]:
         """
-        Gets a site availability info from database by URL.
+        Gets availability info for several sites from database in one query.
 
         Args:
-            url (str): URL of site.
+            urls (list[str]): URLs of sites.
 
         Returns:
-            Site|None: information about site availability or `None` if there is no information about site.
+            dict[str, Site]: information about sites availability by URL. Sites without records are omitted.
         """
-        if (site_record := await self._db.sites.find_one({"url": url})) is not None:
-            site_record = Site(**site_record)
-        return site_record
+        return {
+            site_record["url"]: Site(**site_record)
+            for site_record in await self._sites.find({"url": {"$in": urls}}, SITE_PROJECTION).to_list()
+        }
 
-    async def update_site(self, url: str, status: int, failures: int) -> None:
+    async def update_sites(self, sites: list[tuple[str, int, int]]) -> bool:
         """
-        Updates a record about site availability.
+        Updates records about several sites availability in one request.
+        Records are created for sites without them.
 
         Args:
-            url (str): URL of site.
-            status (int): Status code.
-            failures (int): The number of failed checks in a row.
+            sites (list[tuple[str, int, int]]): URL, status code and the number of failed checks in a row
+                for each site.
+
+        Returns:
+            bool: True if the write was acknowledged.
         """
-        await self._db.sites.update_one(
-            {"url": url}, {"$set": {"status": status, "consecutive_failures": failures}}
+        if not sites:
+            return True
+        result = await self._sites.bulk_write(
+            [
+                pymongo.UpdateOne(
+                    {"url": url},
+                    {"$set": {"status": status, "consecutive_failures": failures}},
+                    upsert=True,
+                )
+                for url, status, failures in sites
+            ],
+            ordered=False,
         )
+        return result.acknowledged
 
-    async def add_site(self, url: str, status: int) -> str:
+    async def upsert_site(self, url: str, status: int) -> bool:
         """
-        Adds a record about site availability to database.
+        Adds a record about site availability to database if there is no record for this URL yet.
 
         Args:
             url (str): URL of site.
-            status (int): Status code.
+            status (int): Status code for the new record.
 
         Returns:
-            str: Id of new record in database.
+            bool: True if the write was acknowledged.
         """
-        return str((await self._db.sites.insert_one(
-            {"url": url, "status": status, "consecutive_failures": 0}
-        )).inserted_id)
+        result = await self._sites.update_one(
+            {"url": url},
+            {"$setOnInsert": {"status": status, "consecutive_failures": 0}},
+            upsert=True,
+        )
+        return result.acknowledged
 
     async def add_monitor(self, user_id: int, url: str, interval: int) -> str:
         """
@@ -101,74 +252,103 @@ class DBHandler(metaclass=ExceptionHandlingMeta):
         Returns:
             str: Id of new record in database.
         """
-        return str((await self._db.monitors.insert_one(
+        monitor_id = str((await self._monitors.insert_one(
             {"user_id": user_id, "url": url, "interval": interval}
         )).inserted_id)
+        self._invalidate_schedule()
+        return monitor_id
 
-    async def delete_monitor(self, user_id: int, url: str) -> int:
+    async def get_monitor_users_by_url(self, url: str) -> list[int]:
+        return await self._monitors.distinct("user_id", {"url": url})
+
+    async def get_user_monitors(self, user_id: int, skip: int = 0, limit: int = None) -> list[Monitor]:
         """
-        Deletes a record about monitoring URL from database.
+        Gets all monitors for user.
 
         Args:
             user_id (int): Telegram user_id.
-            url (str): Monitored URL to delete.
-        
+
         Returns:
-            int: Number of deleted monitors.
+            list[Monitor]: List of user`s monitors.
         """
-        return (await self._db.monitors.delete_one({"user_id": user_id, "url": url})).deleted_count
+        return [Monitor(**monitor_record) for monitor_record in 
+                await self._monitors.find({"user_id": user_id}, MONITOR_PROJECTION, skip=skip, limit=limit).to_list()]
 
-    async def update_monitor(self, user_id: int, url: str, interval: int) -> int:
+    async def get_user_monitors_page(self, user_id: int, skip: int, limit: int) -> tuple[list[Monitor], int]:
         """
-        Updates a record about monitoring URL in database.
+        Gets a page of user`s monitors together with the total number of user`s monitors in one query.
 
         Args:
             user_id (int): Telegram user_id.
-            url (str): URL to check.
-            interval (int): New interval value between checks in seconds.
+            skip (int): Number of monitors to skip.
+            limit (int): Maximum number of monitors on the page.
 
         Returns:
-            int: Number of modified_monitors.
+            tuple[list[Monitor], int]: List of monitors on the page and the number of all user`s monitors.
         """
-        return (await self._db.monitors.update_one(
-            {"user_id": user_id, "url": url}, {"$set": {"interval": interval}}
-        )).modified_count
-    
-    async def get_monitor_users_by_url(self, url: str) -> list[int]:
-        return await self._db.monitors.distinct("user_id", {"url": url})
-    async def get_user_monitors_count(self, user_id: int) -> int:
+        result = await (await self._monitors.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$sort": {"_id": 1}},
+            {"$facet": {
+                "items": [{"$skip": skip}, {"$limit": limit}, {"$project": MONITOR_PROJECTION}],
+                "total": [{"$count": "n"}],
+            }},
+        ])).to_list()
+        page = result[0]
+        total = page["total"][0]["n"] if page["total"] else 0
+        return [Monitor(**monitor_record) for monitor_record in page["items"]], total
+
+    async def delete_user_monitor(self, user_id: int, monitor_id: str) -> str | None:
         """
-        Calculates the number of user`s monitors.
+        Deletes the user`s monitor by its id in one request.
 
         Args:
-            user_id (int): User id in Telegram.
+            user_id (int): Telegram user_id.
+            monitor_id (str): Id of the monitor record.
 
         Returns:
-            int: number of user`s monitors.
+            str|None: URL of the deleted monitor or `None` if the user has no such monitor.
         """
-        return await self._db.monitors.count_documents({"user_id": user_id})
+        monitor_record = await self._monitors.find_one_and_delete(
+            {"_id": ObjectId(monitor_id), "user_id": user_id}, projection={"url": 1}
+        )
+        if monitor_record is None:
+            return None
+        self._invalidate_schedule()
+        return monitor_record["url"]
 
-    async def get_user_monitors(self, user_id: int, skip: int = 0, limit: int = None) -> list[Monitor]:
+    async def update_user_monitor(self, user_id: int, monitor_id: str, interval: int) -> str | None:
         """
-        Gets all monitors for user.
+        Updates the interval of the user`s monitor by its id in one request.
 
         Args:
             user_id (int): Telegram user_id.
+            monitor_id (str): Id of the monitor record.
+            interval (int): New interval value between checks in seconds.
 
         Returns:
-            list[Monitor]: List of user`s monitors.
+            str|None: URL of the updated monitor or `None` if the user has no such monitor.
         """
-        return [Monitor(**monitor_record) for monitor_record in 
-                await self._db.monitors.find({"user_id": user_id}, skip=skip, limit=limit).to_list()]
-    
+        monitor_record = await self._monitors.find_one_and_update(
+            {"_id": ObjectId(monitor_id), "user_id": user_id},
+            {"$set": {"interval": interval}},
+            projection={"url": 1},
+        )
+        if monitor_record is None:
+            return None
+        self._invalidate_schedule()
+        return monitor_record["url"]
+
     async def check_user_monitors_for_url(self, user_id: int, url: str):
-        if await self._db.monitors.find_one({"user_id": user_id, "url": url}):
+        if await self._monitors.find_one({"user_id": user_id, "url": url}):
             return True
         return False
 
     async def get_monitors_urls_for_tick(self, seconds: int) -> list[str]:
         """
         Finds URLs to check for a specific moment.
+        The monitors schedule is kept in memory, so the database is queried
+        only on the first tick and after monitors changes.
 
         Args:
             seconds(int): The number of seconds that determines which URLs should be checked.
@@ -176,9 +356,14 @@ class DBHandler(metaclass=ExceptionHandlingMeta):
         Returns:
             list[str]: A list of unique URLs to check on specific moment.
         """
-        return await self._db.monitors.distinct(
-            "url", {"$where": f"({seconds} % this.interval) == 0"}
-        )
+        schedule = self._schedule
+        if schedule is None:
+            schedule = await self._load_schedule()
+        urls: set[str] = set()
+        for interval, interval_urls in schedule.items():
+            if seconds % interval == 0:
+                urls |= interval_urls
+        return list(urls)
 
     async def add_check_record(self, response_info: dict) -> str:
         """
@@ -190,13 +375,51 @@ class DBHandler(metaclass=ExceptionHandlingMeta):
         Returns:
             str: Id of new record in database.
         """
-        return str((await self._db.checks.insert_one(response_info)).inserted_id)
+        return str((await self._checks.insert_one(response_info)).inserted_id)
+
+    async def add_check_records(self, responses_info: list[dict]) -> list[str]:
+        """
+        Adds several records of the URLs checking results in one request.
+        The write is not acknowledged by the server, so failed inserts are not reported.
+
+        Args:
+            responses_info (list[dict]): documents with information about urls requests and responses.
+
+        Returns:
+            list[str]: Ids of new records in database.
+        """
+        if not responses_info:
+            return []
+        result = await self._checks_unacked.insert_many(responses_info, ordered=False)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+    async def iter_check_records(
+        self, url: str, beg_date: datetime, end_date: datetime, projection: dict = CHECK_PROJECTION
+    ) -> AsyncIterator[Check]:
+        """
+        Iterates over checks records for the specified period in timestamp order as they are received from the database.
+
+        Args:
+            url (str): URL of checked site.
+            beg_date (datetime): Begin of search period.
+            end_date (datetime): End of search period.
+            projection (dict, optional): Fields of the records to load. Defaults to all fields of Check.
 
-    async def get_check_records(
+        Yields:
+            Check: Check record.
+        """
+        async for check_record in self._checks.find(
+            {"url": url, "timestamp": {"$gte": beg_date, "$lte": end_date}},
+            projection,
+            sort=[("timestamp", pymongo.ASCENDING)],
+        ):
+            yield Check(**check_record)
+
+    async def get_daily_check_stats(
         self, url: str, beg_date: datetime, end_date: datetime
-    ) -> list[Check]:
+    ) -> dict[date, dict]:
         """
-        Finds in the database all checks records for the specified period.
+        Calculates the checks statistics for the specified period by day on the database side.
 
         Args:
             url (str): URL of checked site.
@@ -204,24 +427,35 @@ class DBHandler(metaclass=ExceptionHandlingMeta):
             end_date (datetime): End of search period.
 
         Returns:
-            list[Check]: List of checks records.
+            dict[date, dict]: Day -> statistics of the day checks: "total", "successful",
+                "response_times_sum", "response_times_count", "max_response_time", "min_response_time".
+                Response times are taken from successful checks only, max/min are None without them.
+                Days without checks are absent.
         """
-        return [Check(**check_record) for check_record in await self._db.checks.find(
-            {"url": url, "timestamp": {"$gte": beg_date, "$lte": end_date}}
-        ).to_list()]
+        cursor = await self._checks.aggregate([
+            {"$match": {"url": url, "timestamp": {"$gte": beg_date, "$lte": end_date}}},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}},
+                "total": {"$sum": 1},
+                "successful": {"$sum": {"$cond": [{"$eq": ["$status", ResponseStatus.OK.value]}, 1, 0]}},
+                "response_times_sum": {"$sum": _SUCCESSFUL_RESPONSE_TIME},
+                "response_times_count": {"$sum": {"$cond": [{"$eq": [_SUCCESSFUL_RESPONSE_TIME, None]}, 0, 1]}},
+                "max_response_time": {"$max": _SUCCESSFUL_RESPONSE_TIME},
+                "min_response_time": {"$min": _SUCCESSFUL_RESPONSE_TIME},
+            }},
+        ])
+        return {day_stats.pop("_id").date(): day_stats async for day_stats in cursor}
 
 if __name__ == "__main__":
     import asyncio
 
     async def main():
         d = DBHandler()
-        print(await d.get_site("https://ya.ru"))
+        print(await d.get_sites(["https://ya.ru"]))
         # await d.add_monitor(123, "http://localhost:8000", 10)
         # await d.add_monitor(1235, "https://ya.ru", 20)
-        # await d.delete_monitor(1234, "https://ya.ru")
-        # await d.update_monitor(1234, "https://ya.ru", 120)
         # print(
-        #     await d.get_check_records(
+        #     await d.get_daily_check_stats(
         #         "http://localhost:8000",
         #         datetime(year=2025, month=1, day=1),
         #         datetime(year=2026, month=1, day=1),
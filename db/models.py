@@ -2,7 +2,7 @@ from datetime import datetime
 from dataclasses import dataclass
 from utils.enums import SiteStatus, ResponseStatus
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Site:
     """Object of site record in db."""
     _id: str
@@ -11,10 +11,10 @@ class Site:
     consecutive_failures: int
 
     def __post_init__(self):
-        self._id = str(self._id)
-        self.status = SiteStatus(self.status)
+        object.__setattr__(self, "_id", str(self._id))
+        object.__setattr__(self, "status", SiteStatus(self.status))
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Monitor:
     """Object of monitor record in db."""
     _id: str
@@ -22,9 +22,9 @@ class Monitor:
     url: str
     interval: int
     def __post_init__(self):
-        self._id = str(self._id)
+        object.__setattr__(self, "_id", str(self._id))
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Check:
     """Object of check record in db."""
     _id: str
@@ -34,10 +34,10 @@ class Check:
     code: int | None = None
     response_time: float | None = None
     def __post_init__(self):
-        self._id = str(self._id)
-        self.status = ResponseStatus(self.status)
+        object.__setattr__(self, "_id", str(self._id))
+        object.__setattr__(self, "status", ResponseStatus(self.status))
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class User:
     """Object of check record in db."""
     _id: str
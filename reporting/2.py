@@ -1,17 +1,85 @@
+import asyncio
+import functools
 import io
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
+import matplotlib
+
+matplotlib.use("Agg")  # графики только сохраняются в PNG, GUI бэкенд не нужен
+
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+from db.models import Check
+from utils.enums import ResponseStatus
+
+try:
+    import pyspng
+except ImportError:
+    pyspng = None
+
+ASCII_BAR_WIDTH = 30
+ASCII_BAR_FULL = "█" * ASCII_BAR_WIDTH
+ASCII_BAR_EMPTY = "░" * ASCII_BAR_WIDTH
+# Сколько отчетов по мониторам пользователя строится одновременно
+SUMMARY_REPORTS_CONCURRENCY = 8
+
+
+@functools.lru_cache(maxsize=256)
+def _format_duration(seconds: int) -> str:
+    """Форматировать длительность. Длительности инцидентов часто повторяются, поэтому кешируется"""
+    if seconds < 60:
+        return f"{seconds}с"
+    elif seconds < 3600:
+        return f"{seconds // 60}м"
+    else:
+        hours = seconds // 3600
+        minutes = (seconds % 3600) // 60
+        return f"{hours}ч {minutes}м"
+
+
+@functools.lru_cache(maxsize=8)
+def _message_png(text: str, color: str) -> bytes:
+    """PNG 400x200 с одной надписью, рисуется один раз для каждой надписи. Только для потока Matplotlib"""
+    fig = plt.figure(figsize=(4, 2), dpi=100)
+    fig.text(0.5, 0.5, text, ha="center", va="center", fontsize=16, color=color)
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format="PNG", pil_kwargs={"compress_level": 1})
+    plt.close(fig)
+    return img_buffer.getvalue()
+
+
+# Настройки для графиков применяются один раз при импорте модуля
+plt.rcParams.update(plt.style.library["seaborn-v0_8"])
+# Длинные линии рисуются частями, быстрее для Agg
+plt.rcParams["agg.path.chunksize"] = 10000
+
+# Поиск шрифтов стиля и инициализация Agg при импорте, а не на первом графике
+_warmup_figure = plt.figure(figsize=(1, 1))
+_warmup_figure.text(0.5, 0.5, "Uptime 0123456789 %")
+_warmup_figure.canvas.draw()
+plt.close(_warmup_figure)
+del _warmup_figure
+
+# Matplotlib не потокобезопасен, поэтому графики всех генераторов рисуются в одном отдельном потоке
+_MATPLOTLIB_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mpl")
+
 
 class ChartGenerator:
-    def __init__(self):
-        # Настройки для графиков
-        plt.style.use("seaborn-v0_8")
+    def __init__(self, dpi: int = 120, dashboard_dpi: int = 150):
+        # Графики смотрят в Telegram, большее разрешение только замедляет отрисовку
+        self.dpi = dpi
+        self.dashboard_dpi = dashboard_dpi
+        # Пул фигур по типу графика: создание фигуры и осей дороже их очистки
+        self._figures: dict[str, tuple[Figure, Any, list]] = {}
         self.colors = {
             "success": "#2ecc71",
             "failure": "#e74c3c",
@@ -20,12 +88,78 @@ class ChartGenerator:
             "text": "#2c3e50",
         }
 
+    @staticmethod
+    def _to_png(fig, dpi: int, tight: bool = False) -> io.BytesIO:
+        """
+        Сохранить фигуру в PNG. Если поля не обрезаются и установлен pyspng,
+        готовый RGBA буфер Agg кодируется напрямую, минуя Pillow
+        """
+        if pyspng is not None and not tight:
+            fig.set_dpi(dpi)
+            fig.canvas.draw()
+            rgba = np.asarray(fig.canvas.buffer_rgba())
+            return io.BytesIO(pyspng.encode(rgba, compress_level=1))
+
+        img_buffer = io.BytesIO()
+        fig.savefig(
+            img_buffer,
+            format="PNG",
+            dpi=dpi,
+            bbox_inches="tight" if tight else None,
+            pil_kwargs={"compress_level": 1},
+        )
+        img_buffer.seek(0)
+        return img_buffer
+
+    async def _render(self, render, *args) -> io.BytesIO:
+        """Отрисовать график в потоке Matplotlib, не блокируя цикл событий"""
+        return await asyncio.get_running_loop().run_in_executor(_MATPLOTLIB_EXECUTOR, render, *args)
+
+    def _get_figure(self, key: str, figsize: tuple, nrows: int = 1, ncols: int = 1):
+        """Взять фигуру из пула с очищенными осями. Только для потока Matplotlib"""
+        if key not in self._figures:
+            # Фигуры пула живут все время жизни генератора, поэтому создаются без pyplot:
+            # pyplot не хранит ссылки на них, и они освобождаются вместе с генератором
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            axes = fig.subplots(nrows, ncols)
+            self._figures[key] = (fig, axes, [ax.get_subplotspec() for ax in fig.axes])
+            return fig, axes
+
+        fig, axes, subplotspecs = self._figures[key]
+        # Убираем добавленные оси (colorbar) и возвращаем осям исходное положение
+        for extra_ax in fig.axes[len(subplotspecs):]:
+            extra_ax.remove()
+        for ax, subplotspec in zip(fig.axes, subplotspecs):
+            ax.clear()
+            ax.set_subplotspec(subplotspec)
+        return fig, axes
+
+    @staticmethod
+    def _daily_arrays(report) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Даты, uptime и время ответа по дням в виде массивов за один проход по daily_stats"""
+        count = len(report.daily_stats)
+        return (
+            np.array([stat["date"] for stat in report.daily_stats], dtype="datetime64[s]"),
+            np.fromiter(
+                (stat["uptime_percentage"] for stat in report.daily_stats), dtype=np.float64, count=count
+            ),
+            np.fromiter(
+                (stat["average_response_time"] for stat in report.daily_stats), dtype=np.float64, count=count
+            ),
+        )
+
     async def generate_uptime_chart(self, report) -> io.BytesIO:
         """График uptime по дням недели"""
-        fig, ax = plt.subplots(figsize=(12, 6))
+        return await self._render(self._render_uptime_chart, report)
 
-        dates = [stat["date"] for stat in report.daily_stats]
-        uptimes = [stat["uptime_percentage"] for stat in report.daily_stats]
+    def _render_uptime_chart(self, report) -> io.BytesIO:
+        """График uptime по дням недели"""
+        if not report.daily_stats:
+            return io.BytesIO(_message_png("Нет данных", self.colors["text"]))
+        fig, ax = self._get_figure("uptime", (12, 6))
+
+        dates, uptimes, _ = self._daily_arrays(report)
 
         # Основной график
         ax.plot(
@@ -46,7 +180,7 @@ class ChartGenerator:
         # Форматирование дат
         ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m"))
         ax.xaxis.set_major_locator(mdates.DayLocator())
-        plt.xticks(rotation=45)
+        ax.tick_params(axis="x", labelrotation=45)
 
         # Добавляем горизонтальные линии для ориентира
         ax.axhline(y=99, color="red", linestyle="--", alpha=0.5, label="99% SLA")
@@ -54,26 +188,27 @@ class ChartGenerator:
 
         ax.legend()
         ax.grid(True, alpha=0.3)
-        plt.tight_layout()
+        # Фиксированные поля вместо bbox_inches="tight", который требует лишней отрисовки
+        fig.subplots_adjust(left=0.08, right=0.95, top=0.9, bottom=0.15)
 
         # Сохраняем в BytesIO
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format="PNG", dpi=300, bbox_inches="tight")
-        img_buffer.seek(0)
-        plt.close()
-
-        return img_buffer
+        return self._to_png(fig, self.dpi)
 
     async def generate_response_time_chart(self, report) -> io.BytesIO:
         """График времени ответа"""
-        fig, ax = plt.subplots(figsize=(12, 6))
+        return await self._render(self._render_response_time_chart, report)
 
-        dates = [stat["date"] for stat in report.daily_stats]
-        response_times = [stat["average_response_time"] for stat in report.daily_stats]
+    def _render_response_time_chart(self, report) -> io.BytesIO:
+        """График времени ответа"""
+        if not report.daily_stats:
+            return io.BytesIO(_message_png("Нет данных", self.colors["text"]))
+        fig, ax = self._get_figure("response_time", (12, 6))
+
+        dates, _, response_times = self._daily_arrays(report)
 
         # Убираем нулевые значения для лучшей визуализации
-        filtered_data = [(d, rt) for d, rt in zip(dates, response_times) if rt > 0]
-        if not filtered_data:
+        has_data = response_times > 0
+        if not has_data.any():
             # Если нет данных, создаем пустой график
             ax.text(
                 0.5,
@@ -85,7 +220,7 @@ class ChartGenerator:
                 fontsize=16,
             )
         else:
-            dates_filtered, times_filtered = zip(*filtered_data)
+            dates_filtered, times_filtered = dates[has_data], response_times[has_data]
 
             ax.plot(
                 dates_filtered,
@@ -107,107 +242,93 @@ class ChartGenerator:
 
             # Форматирование дат
             ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m"))
-            plt.xticks(rotation=45)
+            ax.tick_params(axis="x", labelrotation=45)
 
         ax.grid(True, alpha=0.3)
-        plt.tight_layout()
+        # Фиксированные поля вместо bbox_inches="tight", который требует лишней отрисовки
+        fig.subplots_adjust(left=0.08, right=0.95, top=0.9, bottom=0.15)
 
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format="PNG", dpi=300, bbox_inches="tight")
-        img_buffer.seek(0)
-        plt.close()
-
-        return img_buffer
+        return self._to_png(fig, self.dpi)
 
     async def generate_incidents_timeline(self, report) -> io.BytesIO:
         """Временная линия инцидентов"""
-        fig, ax = plt.subplots(figsize=(14, 8))
+        return await self._render(self._render_incidents_timeline, report)
 
+    def _render_incidents_timeline(self, report) -> io.BytesIO:
+        """Временная линия инцидентов"""
         if not report.incidents:
+            return io.BytesIO(_message_png("Инцидентов не обнаружено 🎉", self.colors["success"]))
+        fig, ax = self._get_figure("incidents", (14, 8))
+
+        # Создаем временную линию: все полосы инцидентов одним вызовом
+        colors_list = [self.colors["failure"], self.colors["warning"]]
+        now = datetime.now()
+        starts = mdates.date2num([incident["start_time"] for incident in report.incidents])
+        ends = mdates.date2num([incident["end_time"] or now for incident in report.incidents])
+        widths = ends - starts  # в днях, как и временная ось
+
+        ax.barh(
+            np.arange(len(report.incidents)),
+            widths,
+            left=starts,
+            height=0.6,
+            color=[colors_list[i % len(colors_list)] for i in range(len(report.incidents))],
+            alpha=0.7,
+        )
+
+        # Добавляем подписи в центре полос
+        for y_pos, (incident, center) in enumerate(zip(report.incidents, starts + widths / 2)):
+            duration_str = _format_duration(incident["duration"])
             ax.text(
-                0.5,
-                0.5,
-                "Инцидентов не обнаружено 🎉",
+                center,
+                y_pos,
+                f'{incident["reason"]}\n{duration_str}',
                 ha="center",
                 va="center",
-                transform=ax.transAxes,
-                fontsize=18,
-                color=self.colors["success"],
-            )
-        else:
-            # Создаем временную линию
-            y_pos = 0
-            colors_list = [self.colors["failure"], self.colors["warning"]]
-
-            for i, incident in enumerate(report.incidents):
-                start = incident["start_time"]
-                end = incident["end_time"] if incident["end_time"] else datetime.now()
-                duration = incident["duration"]
-
-                # Рисуем полосу инцидента
-                ax.barh(
-                    y_pos,
-                    (end - start).total_seconds() / 3600,
-                    left=mdates.date2num(start),
-                    height=0.6,
-                    color=colors_list[i % len(colors_list)],
-                    alpha=0.7,
-                )
-
-                # Добавляем подпись
-                duration_str = self._format_duration(duration)
-                ax.text(
-                    mdates.date2num(start) + (end - start).total_seconds() / 7200,
-                    y_pos,
-                    f'{incident["reason"]}\n{duration_str}',
-                    ha="center",
-                    va="center",
-                    fontsize=10,
-                    fontweight="bold",
-                )
-
-                y_pos += 1
-
-            # Настройки осей
-            ax.set_ylim(-0.5, len(report.incidents) - 0.5)
-            ax.set_ylabel("Инциденты", fontsize=12, fontweight="bold")
-            ax.set_xlabel("Время", fontsize=12, fontweight="bold")
-            ax.set_title(
-                f"Временная линия инцидентов - {report.url}",
-                fontsize=14,
+                fontsize=10,
                 fontweight="bold",
             )
 
-            # Форматирование временной оси
-            ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m %H:%M"))
-            ax.xaxis.set_major_locator(mdates.HourLocator(interval=6))
-            plt.xticks(rotation=45)
+        # Настройки осей
+        ax.set_ylim(-0.5, len(report.incidents) - 0.5)
+        ax.set_ylabel("Инциденты", fontsize=12, fontweight="bold")
+        ax.set_xlabel("Время", fontsize=12, fontweight="bold")
+        ax.set_title(
+            f"Временная линия инцидентов - {report.url}",
+            fontsize=14,
+            fontweight="bold",
+        )
 
-        plt.tight_layout()
+        # Форматирование временной оси
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m %H:%M"))
+        ax.xaxis.set_major_locator(mdates.HourLocator(interval=6))
+        ax.tick_params(axis="x", labelrotation=45)
 
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format="PNG", dpi=300, bbox_inches="tight")
-        img_buffer.seek(0)
-        plt.close()
+        fig.tight_layout()
 
-        return img_buffer
+        return self._to_png(fig, self.dpi, tight=True)
 
     async def generate_status_heatmap(self, report) -> io.BytesIO:
         """Тепловая карта статусов по часам и дням"""
-        fig, ax = plt.subplots(figsize=(16, 8))
+        return await self._render(self._render_status_heatmap, report)
 
-        # Создаем матрицу 7x24 (дни x часы)
-        heatmap_data = np.zeros((7, 24))
+    def _render_status_heatmap(self, report) -> io.BytesIO:
+        """Тепловая карта статусов по часам и дням"""
+        if not report.daily_stats:
+            return io.BytesIO(_message_png("Нет данных", self.colors["text"]))
+        fig, ax = self._get_figure("heatmap", (16, 8))
 
         # Получаем детальные данные из БД (нужно будет добавить этот метод)
         # Пока создадим примерную карту на основе daily_stats
-        for i, day_stat in enumerate(report.daily_stats):
-            uptime = day_stat["uptime_percentage"]
-            # Заполняем все часы дня одним значением (упрощение)
-            heatmap_data[i, :] = uptime
+        _, uptimes, _ = self._daily_arrays(report)
+        days_uptimes = np.full(7, np.nan)  # дни без данных остаются NaN
+        days_uptimes[: len(uptimes)] = uptimes
+        # Матрица 7x24 (дни x часы): все часы дня с одним значением (упрощение), без копирования
+        heatmap_data = np.broadcast_to(days_uptimes[:, np.newaxis], (7, 24))
 
         # Создаем heatmap
-        im = ax.imshow(heatmap_data, cmap="RdYlGn", aspect="auto", vmin=0, vmax=100)
+        cmap = plt.get_cmap("RdYlGn").with_extremes(bad="lightgray")
+        im = ax.imshow(heatmap_data, cmap=cmap, aspect="auto", vmin=0, vmax=100)
 
         # Настройки осей
         ax.set_xticks(range(24))
@@ -222,25 +343,25 @@ class ChartGenerator:
         )
 
         # Добавляем colorbar
-        cbar = plt.colorbar(im, ax=ax)
+        cbar = fig.colorbar(im, ax=ax)
         cbar.set_label("Uptime %", fontsize=12, fontweight="bold")
 
-        plt.tight_layout()
+        fig.tight_layout()
 
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format="PNG", dpi=300, bbox_inches="tight")
-        img_buffer.seek(0)
-        plt.close()
-
-        return img_buffer
+        return self._to_png(fig, self.dpi, tight=True)
 
     async def generate_summary_dashboard(self, report) -> io.BytesIO:
         """Сводная панель с несколькими графиками"""
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
+        return await self._render(self._render_summary_dashboard, report)
+
+    def _render_summary_dashboard(self, report) -> io.BytesIO:
+        """Сводная панель с несколькими графиками"""
+        if not report.daily_stats:
+            return io.BytesIO(_message_png("Нет данных", self.colors["text"]))
+        fig, ((ax1, ax2), (ax3, ax4)) = self._get_figure("summary", (16, 12), 2, 2)
 
         # График 1: Uptime по дням
-        dates = [stat["date"] for stat in report.daily_stats]
-        uptimes = [stat["uptime_percentage"] for stat in report.daily_stats]
+        dates, uptimes, response_times = self._daily_arrays(report)
 
         ax1.plot(dates, uptimes, color=self.colors["success"], linewidth=2, marker="o")
         ax1.fill_between(dates, uptimes, alpha=0.3, color=self.colors["success"])
@@ -250,12 +371,8 @@ class ChartGenerator:
         ax1.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m"))
 
         # График 2: Время ответа
-        response_times = [
-            stat["average_response_time"]
-            for stat in report.daily_stats
-            if stat["average_response_time"] > 0
-        ]
-        if response_times:
+        response_times = response_times[response_times > 0]
+        if response_times.size:
             ax2.bar(
                 range(len(response_times)),
                 response_times,
@@ -312,71 +429,113 @@ class ChartGenerator:
 
         # Общий заголовок
         fig.suptitle(f"Сводный отчет - {report.url}", fontsize=16, fontweight="bold")
-        plt.tight_layout()
+        fig.tight_layout()
 
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format="PNG", dpi=300, bbox_inches="tight")
-        img_buffer.seek(0)
-        plt.close()
+        return self._to_png(fig, self.dashboard_dpi, tight=True)
 
-        return img_buffer
+    async def generate_comparison_chart(self, reports: list) -> io.BytesIO:
+        """Сравнительный график uptime для нескольких отчетов"""
+        return await self._render(self._render_comparison_chart, reports)
+
+    def _render_comparison_chart(self, reports: list) -> io.BytesIO:
+        """Сравнительный график uptime для нескольких отчетов"""
+        if not reports:
+            return io.BytesIO(_message_png("Нет данных", self.colors["text"]))
+        fig, ax = self._get_figure("comparison", (14, 8))
+        colors = ["#3498db", "#e74c3c", "#2ecc71", "#f39c12", "#9b59b6", "#1abc9c"]
+
+        reports = reports[:6]
+        lines_colors = colors[: len(reports)]
+        segments = []
+        legend_handles = []
+        for report, color in zip(reports, lines_colors):
+            dates, uptimes, _ = self._daily_arrays(report)
+            segments.append(np.column_stack([mdates.date2num(dates), uptimes]))
+
+            # Извлекаем домен из URL для подписи
+            domain = (
+                report.url.replace("https://", "")
+                .replace("http://", "")
+                .split("/")[0]
+            )
+            legend_handles.append(
+                Line2D([], [], color=color, linewidth=2, marker="o", markersize=6, label=domain)
+            )
+
+        # Все линии одной коллекцией и все маркеры одним scatter вместо отдельного plot на монитор
+        ax.add_collection(LineCollection(segments, colors=lines_colors, linewidths=2))
+        if segments:
+            ax.scatter(
+                np.concatenate([segment[:, 0] for segment in segments]),
+                np.concatenate([segment[:, 1] for segment in segments]),
+                c=np.repeat(lines_colors, [len(segment) for segment in segments]),
+                s=36,
+                zorder=3,
+            )
+        ax.autoscale_view()
+
+        ax.set_ylim(0, 100)
+        ax.set_ylabel("Uptime %", fontsize=12, fontweight="bold")
+        ax.set_xlabel("Дата", fontsize=12, fontweight="bold")
+        ax.set_title("Сравнение Uptime за неделю", fontsize=14, fontweight="bold")
+
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m"))
+        ax.xaxis.set_major_locator(mdates.DayLocator())
+        ax.tick_params(axis="x", labelrotation=45)
+
+        ax.legend(handles=legend_handles, bbox_to_anchor=(1.05, 1), loc="upper left")
+        ax.grid(True, alpha=0.3)
+
+        # Фиксированные поля вместо bbox_inches="tight", который требует лишней отрисовки
+        fig.subplots_adjust(left=0.07, right=0.8, top=0.9, bottom=0.15)
+
+        return self._to_png(fig, self.dpi)
 
     async def generate_ascii_chart(self, report) -> str:
         """ASCII график для простых случаев"""
         chart = f"📊 ASCII График Uptime - {report.url}\n"
         chart += "=" * 50 + "\n"
 
-        max_uptime = max([stat["uptime_percentage"] for stat in report.daily_stats])
+        _, uptimes, _ = self._daily_arrays(report)
+        # Длины всех баров считаются разом, сами бары - срезы готовых строк
+        bar_lengths = np.clip(uptimes / 100 * ASCII_BAR_WIDTH, 0, ASCII_BAR_WIDTH).astype(np.int64)
 
-        for stat in report.daily_stats:
+        rows = []
+        for stat, uptime, bar_length in zip(report.daily_stats, uptimes, bar_lengths.tolist()):
             date_str = stat["date"].strftime("%d.%m")
-            uptime = stat["uptime_percentage"]
-
-            # Создаем ASCII бар
-            bar_length = int((uptime / 100) * 30)
-            bar = "█" * bar_length + "░" * (30 - bar_length)
-
-            chart += f"{date_str}: |{bar}| {uptime:5.1f}%\n"
+            bar = ASCII_BAR_FULL[:bar_length] + ASCII_BAR_EMPTY[bar_length:]
+            rows.append(f"{date_str}: |{bar}| {uptime:5.1f}%\n")
+        chart += "".join(rows)
 
         chart += "=" * 50 + "\n"
-        chart += f"Средний uptime: {sum([s['uptime_percentage'] for s in report.daily_stats]) / len(report.daily_stats):.1f}%"
+        chart += f"Средний uptime: {uptimes.mean():.1f}%"
 
         return chart
 
-    def _format_duration(self, seconds: int) -> str:
-        """Форматировать длительность"""
-        if seconds < 60:
-            return f"{seconds}с"
-        elif seconds < 3600:
-            return f"{seconds // 60}м"
-        else:
-            hours = seconds // 3600
-            minutes = (seconds % 3600) // 60
-            return f"{hours}ч {minutes}м"
-
 
 class ReportGeneratorWithCharts:
-    def __init__(self, db_handler):
+    def __init__(self, db_handler, base_generator=None):
         self.db_handler = db_handler
+        self.base_generator = base_generator or ReportGenerator(db_handler)
         self.chart_generator = ChartGenerator()
+        self.chart_methods = {
+            "uptime": self.chart_generator.generate_uptime_chart,
+            "response_time": self.chart_generator.generate_response_time_chart,
+            "incidents": self.chart_generator.generate_incidents_timeline,
+            "heatmap": self.chart_generator.generate_status_heatmap,
+            "summary": self.chart_generator.generate_summary_dashboard,
+            "ascii": self.chart_generator.generate_ascii_chart,
+        }
 
     async def generate_visual_report(
         self, monitor_id: str, chart_type: str = "summary"
     ):
         """Генерировать отчет с графиками"""
         # Используем базовый ReportGenerator для получения данных
-        base_generator = ReportGenerator(self.db_handler)
-        report = await base_generator.generate_weekly_report(monitor_id)
+        report = await self.base_generator.generate_weekly_report(monitor_id)
 
         # Генерируем нужный тип графика
-        chart_methods = {
-            "uptime": self.chart_generator.generate_uptime_chart,
-            "response_time": self.chart_generator.generate_response_time_chart,
-            "incidents": self.chart_generator.generate_incidents_timeline,
-            "heatmap": self.chart_generator.generate_status_heatmap,
-            "summary": self.chart_generator.generate_summary_dashboard,
-            "ascii": self.chart_generator.generate_ascii_chart,
-        }
+        chart_methods = self.chart_methods
 
         if chart_type not in chart_methods:
             raise ValueError(f"Unknown chart type: {chart_type}")
@@ -388,109 +547,60 @@ class ReportGeneratorWithCharts:
             chart_buffer = await chart_methods[chart_type](report)
             return {"report": report, "chart_type": "image", "chart_data": chart_buffer}
 
-    async def generate_all_charts(self, monitor_id: str) -> Dict[str, Any]:
-        """Генерировать все типы графиков для монитора"""
-        base_generator = ReportGenerator(self.db_handler)
-        report = await base_generator.generate_weekly_report(monitor_id)
+    async def generate_all_charts(self, monitor_id: str, report=None) -> Dict[str, Any]:
+        """Генерировать все типы графиков для монитора. Готовый отчет не запрашивается повторно"""
+        if report is None:
+            report = await self.base_generator.generate_weekly_report(monitor_id)
 
-        charts = {}
+        # Генерируем все графики одновременно, ASCII график тоже
+        chart_types = ["uptime", "response_time", "incidents", "heatmap", "summary", "ascii"]
+        results = await asyncio.gather(
+            *(self.chart_methods[chart_type](report) for chart_type in chart_types),
+            return_exceptions=True,
+        )
 
-        # Генерируем все графики
-        chart_types = ["uptime", "response_time", "incidents", "heatmap", "summary"]
-
-        for chart_type in chart_types:
-            try:
-                chart_buffer = await getattr(
-                    self.chart_generator, f"generate_{chart_type}_chart"
-                )(report)
-                charts[chart_type] = chart_buffer
-            except Exception as e:
-                print(f"Error generating {chart_type} chart: {e}")
-                charts[chart_type] = None
-
-        # ASCII график отдельно
-        try:
-            charts["ascii"] = await self.chart_generator.generate_ascii_chart(report)
-        except Exception as e:
-            print(f"Error generating ASCII chart: {e}")
-            charts["ascii"] = None
+        charts = {}
+        for chart_type, result in zip(chart_types, results):
+            if isinstance(result, Exception):
+                print(f"Error generating {chart_type} chart: {result}")
+                result = None
+            charts[chart_type] = result
 
         return {"report": report, "charts": charts}
 
     async def generate_comparison_chart(self, monitor_ids: List[str]) -> io.BytesIO:
         """Сравнительный график для нескольких мониторов"""
-        fig, ax = plt.subplots(figsize=(14, 8))
-
-        base_generator = ReportGenerator(self.db_handler)
-        colors = ["#3498db", "#e74c3c", "#2ecc71", "#f39c12", "#9b59b6", "#1abc9c"]
-
-        for i, monitor_id in enumerate(monitor_ids[:6]):  # Максимум 6 мониторов
-            try:
-                report = await base_generator.generate_weekly_report(monitor_id)
-
-                dates = [stat["date"] for stat in report.daily_stats]
-                uptimes = [stat["uptime_percentage"] for stat in report.daily_stats]
-
-                # Извлекаем домен из URL для подписи
-                domain = (
-                    report.url.replace("https://", "")
-                    .replace("http://", "")
-                    .split("/")[0]
-                )
-
-                ax.plot(
-                    dates,
-                    uptimes,
-                    color=colors[i],
-                    linewidth=2,
-                    marker="o",
-                    label=domain,
-                    markersize=6,
-                )
-
-            except Exception as e:
-                print(f"Error processing monitor {monitor_id}: {e}")
-
-        ax.set_ylim(0, 100)
-        ax.set_ylabel("Uptime %", fontsize=12, fontweight="bold")
-        ax.set_xlabel("Дата", fontsize=12, fontweight="bold")
-        ax.set_title("Сравнение Uptime за неделю", fontsize=14, fontweight="bold")
-
-        ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m"))
-        ax.xaxis.set_major_locator(mdates.DayLocator())
-        plt.xticks(rotation=45)
+        monitor_ids = monitor_ids[:6]  # Максимум 6 мониторов
+        results = await asyncio.gather(
+            *(self.base_generator.generate_weekly_report(monitor_id) for monitor_id in monitor_ids),
+            return_exceptions=True,
+        )
 
-        ax.legend(bbox_to_anchor=(1.05, 1), loc="upper left")
-        ax.grid(True, alpha=0.3)
+        reports = []
+        for monitor_id, result in zip(monitor_ids, results):
+            if isinstance(result, Exception):
+                print(f"Error processing monitor {monitor_id}: {result}")
+            else:
+                reports.append(result)
 
-        plt.tight_layout()
-
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format="PNG", dpi=300, bbox_inches="tight")
-        img_buffer.seek(0)
-        plt.close()
-
-        return img_buffer
+        return await self.chart_generator.generate_comparison_chart(reports)
 
 
 # Дополнительный класс для экспорта отчетов
 class ReportExporter:
-    def __init__(self, db_handler):
+    def __init__(self, db_handler, base_generator=None):
         self.db_handler = db_handler
+        self.base_generator = base_generator or ReportGenerator(db_handler)
 
-    async def export_to_csv(self, monitor_id: str, period_days: int = 7) -> io.StringIO:
-        """Экспорт данных в CSV"""
+    async def export_to_csv(self, url: str, period_days: int = 7) -> io.StringIO:
+        """Экспорт проверок сайта в CSV"""
         import csv
         from io import StringIO
 
         end_date = datetime.now()
         start_date = end_date - timedelta(days=period_days)
 
-        checks = await self.db_handler.get_checks_by_period(
-            monitor_id, start_date, end_date
-        )
-
-        output = StringIO()
+        output = StringIO(newline="")
         writer = csv.writer(output)
 
         # Заголовки
@@ -505,31 +615,32 @@ class ReportExporter:
             ]
         )
 
-        # Данные
-        for check in checks:
+        # Данные. Проверки пишутся по мере чтения из курсора, без промежуточного списка
+        async for check in self.db_handler.iter_check_records(url, start_date, end_date):
+            successful = self._is_check_successful(check)
             writer.writerow(
-                [
-                    check["timestamp"].isoformat(),
-                    check.get("status_code", ""),
-                    check.get("response_time", ""),
-                    "Yes" if self._is_check_successful(check) else "No",
-                    check.get("error_message", ""),
-                    check.get("url", ""),
-                ]
+                (
+                    check.timestamp.isoformat(),
+                    "" if check.code is None else check.code,
+                    "" if check.response_time is None else round(check.response_time * 1000),
+                    "Yes" if successful else "No",
+                    "" if successful else check.status.name,
+                    check.url,
+                )
             )
 
         output.seek(0)
         return output
 
     async def export_to_json(
-        self, monitor_id: str, period_days: int = 7
+        self, monitor_id: str, period_days: int = 7, report=None
     ) -> io.StringIO:
-        """Экспорт данных в JSON"""
+        """Экспорт данных в JSON. Готовый отчет не запрашивается повторно"""
         import json
         from io import StringIO
 
-        base_generator = ReportGenerator(self.db_handler)
-        report = await base_generator.generate_weekly_report(monitor_id)
+        if report is None:
+            report = await self.base_generator.generate_weekly_report(monitor_id)
 
         # Конвертируем dataclass в dict
         export_data = {
@@ -569,44 +680,34 @@ class ReportExporter:
             ],
         }
 
-        output = StringIO()
-        json.dump(export_data, output, indent=2, ensure_ascii=False)
-        output.seek(0)
-        return output
+        # json.dumps собирает строку целиком, json.dump пишет в буфер множеством мелких кусков
+        return StringIO(json.dumps(export_data, indent=2, ensure_ascii=False))
 
-    def _is_check_successful(self, check: Dict[str, Any]) -> bool:
+    def _is_check_successful(self, check: Check) -> bool:
         """Определить, успешна ли проверка"""
-        if check.get("timeout", False):
-            return False
-        if check.get("connection_error", False):
-            return False
-
-        status_code = check.get("status_code")
-        if status_code and status_code >= 400:
-            return False
-
-        return True
+        return check.status is ResponseStatus.OK
 
 
 # Пример использования всех компонентов
 class ComprehensiveReportSystem:
     def __init__(self, db_handler):
         self.db_handler = db_handler
+        # Один генератор отчетов на весь пакет
         self.report_generator = ReportGenerator(db_handler)
-        self.chart_generator = ReportGeneratorWithCharts(db_handler)
-        self.exporter = ReportExporter(db_handler)
+        self.chart_generator = ReportGeneratorWithCharts(db_handler, self.report_generator)
+        self.exporter = ReportExporter(db_handler, self.report_generator)
 
     async def get_full_report_package(self, monitor_id: str) -> Dict[str, Any]:
         """Получить полный пакет отчетов"""
-        # Базовый отчет
+        # Базовый отчет, запрашивается один раз и передается остальным
         text_report = await self.report_generator.generate_weekly_report(monitor_id)
 
-        # Все графики
-        visual_reports = await self.chart_generator.generate_all_charts(monitor_id)
-
-        # Экспорт данных
-        csv_data = await self.exporter.export_to_csv(monitor_id)
-        json_data = await self.exporter.export_to_json(monitor_id)
+        # Все графики и экспорт данных
+        visual_reports, csv_data, json_data = await asyncio.gather(
+            self.chart_generator.generate_all_charts(monitor_id, report=text_report),
+            self.exporter.export_to_csv(text_report.url),
+            self.exporter.export_to_json(monitor_id, report=text_report),
+        )
 
         return {
             "text_report": text_report,
@@ -625,30 +726,37 @@ class ComprehensiveReportSystem:
             "monitors_data": [],
         }
 
-        for monitor in monitors:
-            try:
-                report = await self.report_generator.generate_weekly_report(
-                    monitor["_id"]
-                )
+        semaphore = asyncio.Semaphore(SUMMARY_REPORTS_CONCURRENCY)
 
-                is_healthy = report.stats.uptime_percentage >= 99.0
-                if is_healthy:
-                    summary["healthy_monitors"] += 1
-                else:
-                    summary["unhealthy_monitors"] += 1
-
-                summary["monitors_data"].append(
-                    {
-                        "monitor_id": monitor["_id"],
-                        "url": monitor["url"],
-                        "uptime": report.stats.uptime_percentage,
-                        "incidents_count": len(report.incidents),
-                        "status": "healthy" if is_healthy else "unhealthy",
-                    }
-                )
+        async def monitor_report(monitor):
+            async with semaphore:
+                try:
+                    return await self.report_generator.generate_weekly_report(monitor["_id"])
+                except Exception as e:
+                    print(f"Error processing monitor {monitor['_id']}: {e}")
+                    return None
+
+        reports = await asyncio.gather(*(monitor_report(monitor) for monitor in monitors))
+
+        for monitor, report in zip(monitors, reports):
+            if report is None:
+                summary["unhealthy_monitors"] += 1
+                continue
 
-            except Exception as e:
-                print(f"Error processing monitor {monitor['_id']}: {e}")
+            is_healthy = report.stats.uptime_percentage >= 99.0
+            if is_healthy:
+                summary["healthy_monitors"] += 1
+            else:
                 summary["unhealthy_monitors"] += 1
 
+            summary["monitors_data"].append(
+                {
+                    "monitor_id": monitor["_id"],
+                    "url": monitor["url"],
+                    "uptime": report.stats.uptime_percentage,
+                    "incidents_count": len(report.incidents),
+                    "status": "healthy" if is_healthy else "unhealthy",
+                }
+            )
+
         return summary
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class UptimeStats:
     total_checks: int
     successful_checks: int
@@ -15,7 +15,7 @@ class UptimeStats:
     min_response_time: int
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class WeeklyReport:
     url: str
     period_start: datetime
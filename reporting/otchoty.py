@@ -3,8 +3,18 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
+# Сколько отчетов генерировать одновременно в generate_multiple_reports
+MULTIPLE_REPORTS_CONCURRENCY = 32
 
-@dataclass
+# Полоски текстового графика по порогам доступности
+_BAR_99 = "🟢" * 10
+_BAR_95 = "🟢" * 8 + "🟡" * 2
+_BAR_90 = "🟢" * 7 + "🟡" * 2 + "🔴" * 1
+_BAR_50 = "🟢" * 5 + "🟡" * 3 + "🔴" * 2
+_BAR_LOW = "🟢" * 2 + "🟡" * 2 + "🔴" * 6
+
+
+@dataclass(slots=True, frozen=True)
 class UptimeStats:
     total_checks: int
     successful_checks: int
@@ -16,7 +26,7 @@ class UptimeStats:
     min_response_time: int
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class WeeklyReport:
     monitor_id: str
     url: str
@@ -72,14 +82,22 @@ class ReportGenerator:
     async def generate_multiple_reports(self, user_id: str) -> List[WeeklyReport]:
         """Генерировать отчеты для всех мониторов пользователя"""
         monitors = await self.db_handler.get_user_monitors(user_id)
-        reports = []
+        semaphore = asyncio.Semaphore(MULTIPLE_REPORTS_CONCURRENCY)
+
+        async def monitor_report(monitor):
+            async with semaphore:
+                return await self.generate_weekly_report(monitor["_id"])
 
-        for monitor in monitors:
-            try:
-                report = await self.generate_weekly_report(monitor["_id"])
-                reports.append(report)
-            except Exception as e:
-                print(f"Error generating report for monitor {monitor['_id']}: {e}")
+        results = await asyncio.gather(
+            *(monitor_report(monitor) for monitor in monitors), return_exceptions=True
+        )
+
+        reports = []
+        for monitor, result in zip(monitors, results):
+            if isinstance(result, Exception):
+                print(f"Error generating report for monitor {monitor['_id']}: {result}")
+            else:
+                reports.append(result)
 
         return reports
 
@@ -89,9 +107,8 @@ class ReportGenerator:
             return UptimeStats(0, 0, 0, 0.0, 0, 0.0, 0, 0)
 
         total_checks = len(checks)
-        successful_checks = sum(
-            1 for check in checks if self._is_check_successful(check)
-        )
+        successful = [check for check in checks if self._is_check_successful(check)]
+        successful_checks = len(successful)
         failed_checks = total_checks - successful_checks
 
         uptime_percentage = (
@@ -103,9 +120,9 @@ class ReportGenerator:
 
         # Статистика времени ответа (только для успешных проверок)
         response_times = [
-            check.get("response_time", 0)
-            for check in checks
-            if self._is_check_successful(check) and check.get("response_time")
+            response_time
+            for check in successful
+            if (response_time := check.get("response_time"))
         ]
 
         if response_times:
@@ -181,17 +198,18 @@ class ReportGenerator:
             ]
 
             if day_checks:
-                successful = sum(
-                    1 for check in day_checks if self._is_check_successful(check)
-                )
+                successful_checks = [
+                    check for check in day_checks if self._is_check_successful(check)
+                ]
+                successful = len(successful_checks)
                 total = len(day_checks)
                 uptime_percent = (successful / total) * 100 if total > 0 else 0
 
                 # Среднее время ответа за день
                 response_times = [
-                    check.get("response_time", 0)
-                    for check in day_checks
-                    if self._is_check_successful(check) and check.get("response_time")
+                    response_time
+                    for check in successful_checks
+                    if (response_time := check.get("response_time"))
                 ]
                 avg_response_time = (
                     sum(response_times) / len(response_times) if response_times else 0
@@ -247,39 +265,39 @@ class ReportGenerator:
 
     def format_text_report(self, report: WeeklyReport) -> str:
         """Форматировать отчет в текстовый вид для Telegram"""
-        text = f"📊 **Еженедельный отчет**\n\n"
-        text += f"🌐 **Сайт:** {report.url}\n"
-        text += f"📅 **Период:** {report.period_start.strftime('%d.%m.%Y')} - {report.period_end.strftime('%d.%m.%Y')}\n\n"
-
-        # Основная статистика
         stats = report.stats
-        text += f"📈 **Статистика:**\n"
-        text += f"• Uptime: {stats.uptime_percentage}%\n"
-        text += f"• Всего проверок: {stats.total_checks}\n"
-        text += f"• Успешных: {stats.successful_checks}\n"
-        text += f"• Неудачных: {stats.failed_checks}\n"
+        parts = [
+            "📊 **Еженедельный отчет**\n\n",
+            f"🌐 **Сайт:** {report.url}\n",
+            f"📅 **Период:** {report.period_start.strftime('%d.%m.%Y')} - {report.period_end.strftime('%d.%m.%Y')}\n\n",
+            # Основная статистика
+            "📈 **Статистика:**\n",
+            f"• Uptime: {stats.uptime_percentage}%\n",
+            f"• Всего проверок: {stats.total_checks}\n",
+            f"• Успешных: {stats.successful_checks}\n",
+            f"• Неудачных: {stats.failed_checks}\n",
+        ]
 
         if stats.downtime_duration > 0:
             downtime_str = self._format_duration(stats.downtime_duration)
-            text += f"• Время недоступности: {downtime_str}\n"
+            parts.append(f"• Время недоступности: {downtime_str}\n")
 
         if stats.average_response_time > 0:
-            text += f"• Среднее время ответа: {stats.average_response_time}ms\n"
+            parts.append(f"• Среднее время ответа: {stats.average_response_time}ms\n")
 
         # Инциденты
         if report.incidents:
-            text += f"\n🚨 **Инциденты ({len(report.incidents)}):**\n"
-            for i, incident in enumerate(
-                report.incidents[:5], 1
-            ):  # Показываем только первые 5
-                duration_str = self._format_duration(incident["duration"])
-                text += f"{i}. {incident['start_time'].strftime('%d.%m %H:%M')} - {duration_str} ({incident['reason']})\n"
+            parts.append(f"\n🚨 **Инциденты ({len(report.incidents)}):**\n")
+            parts.extend(
+                f"{i}. {incident['start_time'].strftime('%d.%m %H:%M')} - {self._format_duration(incident['duration'])} ({incident['reason']})\n"
+                for i, incident in enumerate(report.incidents[:5], 1)  # Показываем только первые 5
+            )
 
         # Текстовый график по дням
-        text += f"\n📊 **График по дням:**\n"
-        text += self._create_text_chart(report.daily_stats)
+        parts.append("\n📊 **График по дням:**\n")
+        parts.append(self._create_text_chart(report.daily_stats))
 
-        return text
+        return "".join(parts)
 
     def _format_duration(self, seconds: int) -> str:
         """Форматировать длительность в читаемый вид"""
@@ -294,23 +312,23 @@ class ReportGenerator:
 
     def _create_text_chart(self, daily_stats: List[Dict[str, Any]]) -> str:
         """Создать текстовый график доступности"""
-        chart = ""
+        lines = []
         for day_stat in daily_stats:
             date_str = day_stat["date"].strftime("%d.%m")
             uptime = day_stat["uptime_percentage"]
 
             # Создаем визуальную полоску
             if uptime >= 99:
-                bar = "🟢" * 10
+                bar = _BAR_99
             elif uptime >= 95:
-                bar = "🟢" * 8 + "🟡" * 2
+                bar = _BAR_95
             elif uptime >= 90:
-                bar = "🟢" * 7 + "🟡" * 2 + "🔴" * 1
+                bar = _BAR_90
             elif uptime >= 50:
-                bar = "🟢" * 5 + "🟡" * 3 + "🔴" * 2
+                bar = _BAR_50
             else:
-                bar = "🟢" * 2 + "🟡" * 2 + "🔴" * 6
+                bar = _BAR_LOW
 
-            chart += f"{date_str}: {bar} {uptime}%\n"
+            lines.append(f"{date_str}: {bar} {uptime}%\n")
 
-        return chart
+        return "".join(lines)
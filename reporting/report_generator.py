@@ -1,26 +1,23 @@
-from datetime import datetime, timedelta
+import asyncio
+from datetime import date, datetime, timedelta
 
 from constants import FAILURE_THRESHOLD
-from db.db_handler import DBHandler
+from db.db_handler import CHECK_STATUS_PROJECTION, DBHandler
 from db.models import Check
+from exceptions import MonitoringSystemException
 from reporting.models import UptimeStats, WeeklyReport
 from task_manager.models import ResponseStatus
+from utils.decorators import async_ttl_cache
 from utils.functions import format_duration
 
-class ReportGenerator:
-    db = DBHandler()
+_OK = ResponseStatus.OK
 
-    def _is_check_successful(self, check: Check) -> bool:
-        """
-        Determines whether the check is successful.
+# Text chart bars indexed by the number of green cells (0..10)
+_UPTIME_BARS = tuple("🟢" * green + "🔴" * (10 - green) for green in range(11))
 
-        Args:
-            check (Check): URL check object.
 
-        Returns:
-            bool: True if check is successful. False otherwise.
-        """
-        return check.status == ResponseStatus.OK
+class ReportGenerator:
+    db = DBHandler()
 
     def _get_failure_reason(self, check: Check) -> str:
         """Determines the reason for the failed check
@@ -41,17 +38,16 @@ class ReportGenerator:
             case _:
                 return "Unknown Error"
 
-    def _calculate_downtime_duration(self, checks: list[Check]) -> int:
+    def _sum_incident_durations(self, incidents: list[dict]) -> int:
         """
         Calculates the total unavailability time in seconds.
 
         Args:
-            checks (list[Check]): List of URL checks objects.
+            incidents (list[dict]): List of incidents info objects.
 
         Returns:
             int: total unavailability time in seconds.
         """
-        incidents = self._find_incidents(checks)
         return sum(incident["duration"] for incident in incidents)
 
     async def generate_weekly_report(
@@ -64,19 +60,21 @@ class ReportGenerator:
             url (str): URL of site.
             end_date (datetime, optional): The date of the last day in the report.
                 The report will contain data on inspections 7 days before the specified date. 
-                If not set, it will be datetime.now()
+                If not set, it will be the current minute (datetime.now() without seconds),
+                so reports generated within the same minute share the cached data.
 
         Returns:
             WeeklyReport: An object containing information about URL checks for the week.
         """
         if not end_date:
-            end_date = datetime.now()
+            end_date = datetime.now().replace(second=0, microsecond=0)
 
         start_date = end_date - timedelta(days=7)
-        checks = await self.db.get_check_records(url, start_date, end_date)
-        stats = self._calculate_uptime_stats(checks)
-        incidents = self._find_incidents(checks)
-        daily_stats = self._calculate_daily_stats(checks, start_date, end_date)
+        cached_incidents, daily_check_stats = await self._get_report_data(url, start_date, end_date)
+        # the cached incidents are shared by the reports, each report gets its own copies
+        incidents = [dict(incident) for incident in cached_incidents]
+        stats = self._calculate_uptime_stats(daily_check_stats, incidents)
+        daily_stats = self._calculate_daily_stats(daily_check_stats, start_date, end_date)
 
         return WeeklyReport(
             url=url,
@@ -87,61 +85,48 @@ class ReportGenerator:
             daily_stats=daily_stats,
         )
 
-    def _calculate_uptime_stats(self, checks: list[Check]) -> UptimeStats:
+    @async_ttl_cache(maxsize=64, ttl=60.0)
+    async def _get_report_data(
+        self, url: str, start_date: datetime, end_date: datetime
+    ) -> tuple[tuple[dict, ...], dict[date, dict]]:
         """
-        Calculates uptime/downtime statistics.
+        Gets the incidents and the daily checks statistics for the period.
+
+        The statistics are calculated by the database, only checks statuses are loaded
+        to detect incidents. The result is cached for a short time, so reports
+        on one site for the same period (e.g. for every user monitoring it) share the queries.
+        Failures are not cached.
 
         Args:
-            checks (list[Check]): List of URL checks objects.
+            url (str): URL of checked site.
+            start_date (datetime): Begin of period.
+            end_date (datetime): End of period.
 
         Returns:
-            UptimeStats: An object containing information about uptime statistics.
-        """
-        if not checks:
-            return UptimeStats(0, 0, 0, 0.0, 0, 0.0, 0, 0)
-
-        total_checks = len(checks)
-        successful_checks = sum(
-            1 for check in checks if self._is_check_successful(check)
-        )
-        failed_checks = total_checks - successful_checks
-        uptime_percentage = (
-            (successful_checks / total_checks) * 100 if total_checks > 0 else 0
-        )
-
-        downtime_duration = self._calculate_downtime_duration(checks)
+            tuple[tuple[dict, ...], dict[date, dict]]: Incidents info objects
+                and statistics of the checks by day.
 
-        # only for successful checks
-        response_times = [
-            check.response_time
-            for check in checks
-            if self._is_check_successful(check) and check.response_time
-        ]
-
-        if response_times:
-            avg_response_time = sum(response_times) / len(response_times)
-            max_response_time = max(response_times)
-            min_response_time = min(response_times)
-        else:
-            avg_response_time = max_response_time = min_response_time = 0
-
-        return UptimeStats(
-            total_checks=total_checks,
-            successful_checks=successful_checks,
-            failed_checks=failed_checks,
-            uptime_percentage=round(uptime_percentage, 2),
-            downtime_duration=downtime_duration,
-            average_response_time=round(avg_response_time, 2),
-            max_response_time=max_response_time,
-            min_response_time=min_response_time,
+        Raises:
+            MonitoringSystemException: The checks statistics could not be read from the database.
+        """
+        incidents, daily_check_stats = await asyncio.gather(
+            self._find_incidents(url, start_date, end_date),
+            self.db.get_daily_check_stats(url, start_date, end_date),
         )
+        if daily_check_stats is None:
+            raise MonitoringSystemException(f"Error reading the checks statistics of {url} from the database.")
+        return tuple(incidents), daily_check_stats
 
-    def _find_incidents(self, checks: list[Check]) -> list[dict]:
+    async def _find_incidents(
+        self, url: str, start_date: datetime, end_date: datetime
+    ) -> list[dict]:
         """
-        Analyzes checks records and detects periods of incidents (periods of site unavailability).
+        Streams the checks statuses for the period and detects periods of incidents (periods of site unavailability).
 
         Args:
-            checks (list[Check]): List of URL checks objects.
+            url (str): URL of checked site.
+            start_date (datetime): Begin of period.
+            end_date (datetime): End of period.
 
         Returns:
             list[dict]: List of incidents info objects.
@@ -150,57 +135,99 @@ class ReportGenerator:
         current_incident = None
         failures_counter = 0
         incident_start = None
+        timestamp = None
 
-        for check in sorted(checks, key=lambda x: x.timestamp):
-            is_successful = self._is_check_successful(check)
+        async for check in self.db.iter_check_records(
+            url, start_date, end_date, CHECK_STATUS_PROJECTION
+        ):
+            timestamp = check.timestamp
 
-            if not is_successful:
+            if check.status is not _OK:
                 if failures_counter == 0:
-                    incident_start = check.timestamp
+                    incident_start = timestamp
                 failures_counter += 1
-            else:
-                failures_counter = 0
-
-            if failures_counter >= FAILURE_THRESHOLD and current_incident is None:
-                current_incident = {
-                    "start_time": incident_start,
-                    "end_time": None,
-                    "duration": 0,
-                    "reason": self._get_failure_reason(check),
-                }
+                if failures_counter >= FAILURE_THRESHOLD and current_incident is None:
+                    current_incident = {
+                        "start_time": incident_start,
+                        "end_time": None,
+                        "duration": 0,
+                        "reason": self._get_failure_reason(check),
+                    }
+                continue
 
-            elif is_successful and current_incident is not None:
-                current_incident["end_time"] = check.timestamp  # pylint: disable=unsupported-assignment-operation
-                current_incident["duration"] = (                # pylint: disable=unsupported-assignment-operation
-                    int(
-                        (
-                            current_incident["end_time"] - current_incident["start_time"] # pylint: disable=unsubscriptable-object
-                        ).total_seconds()
-                    )
-                )
+            failures_counter = 0
+            if current_incident is not None:
+                current_incident["end_time"] = timestamp
+                current_incident["duration"] = int((timestamp - current_incident["start_time"]).total_seconds())
                 incidents.append(current_incident)
                 current_incident = None
 
         if current_incident is not None:
             # NOTE граница неоконченного инцидента - время последней записи или текущий момент?
-            current_incident["end_time"] = check.timestamp  # datetime.now()           # pylint: disable=undefined-loop-variable
-            current_incident["duration"] = int(
-                (
-                    current_incident["end_time"] - current_incident["start_time"]
-                ).total_seconds()
-            )
+            current_incident["end_time"] = timestamp  # datetime.now()
+            current_incident["duration"] = int((timestamp - current_incident["start_time"]).total_seconds())
             incidents.append(current_incident)
 
         return incidents
 
+    def _calculate_uptime_stats(
+        self, daily_check_stats: dict[date, dict], incidents: list[dict]
+    ) -> UptimeStats:
+        """
+        Calculates uptime/downtime statistics from the statistics of the checks by day.
+
+        Args:
+            daily_check_stats (dict[date, dict]): Statistics of the checks by day.
+            incidents (list[dict]): List of incidents info objects found in the checks.
+
+        Returns:
+            UptimeStats: An object containing information about uptime statistics.
+        """
+        if not daily_check_stats:
+            return UptimeStats(0, 0, 0, 0.0, 0, 0.0, 0, 0)
+
+        total_checks = successful_checks = 0
+        # only for successful checks
+        response_times_count = 0
+        response_times_sum = 0
+        max_response_time = min_response_time = 0
+        for day_stats in daily_check_stats.values():
+            total_checks += day_stats["total"]
+            successful_checks += day_stats["successful"]
+            if day_stats["response_times_count"] == 0:
+                continue
+            if response_times_count == 0:
+                max_response_time = day_stats["max_response_time"]
+                min_response_time = day_stats["min_response_time"]
+            else:
+                max_response_time = max(max_response_time, day_stats["max_response_time"])
+                min_response_time = min(min_response_time, day_stats["min_response_time"])
+            response_times_count += day_stats["response_times_count"]
+            response_times_sum += day_stats["response_times_sum"]
+
+        failed_checks = total_checks - successful_checks
+        uptime_percentage = (successful_checks / total_checks) * 100
+        avg_response_time = response_times_sum / response_times_count if response_times_count else 0
+
+        return UptimeStats(
+            total_checks=total_checks,
+            successful_checks=successful_checks,
+            failed_checks=failed_checks,
+            uptime_percentage=round(uptime_percentage, 2),
+            downtime_duration=self._sum_incident_durations(incidents),
+            average_response_time=round(avg_response_time, 2),
+            max_response_time=max_response_time,
+            min_response_time=min_response_time,
+        )
+
     def _calculate_daily_stats(
-        self, checks: list[Check], start_date: datetime, end_date: datetime
+        self, daily_check_stats: dict[date, dict], start_date: datetime, end_date: datetime
     ) -> list[dict]:
         """
         Calculates short statistics of site availability by day.
 
         Args:
-            checks (list[Check]): List of URL checks object.
+            daily_check_stats (dict[date, dict]): Statistics of the checks by day.
             start_date (datetime): First day in range.
             end_date (datetime): Last day in range.
 
@@ -208,45 +235,28 @@ class ReportGenerator:
             list[dict]: List of daily stats info.
         """
         daily_stats = []
-        current_date = start_date.date()
-        end_date_only = end_date.date()
-
-        while current_date <= end_date_only:
-            day_checks = [
-                check for check in checks if check.timestamp.date() == current_date
-            ]
-
-            if day_checks:
-                successful = sum(
-                    1 for check in day_checks if self._is_check_successful(check)
-                )
-                total = len(day_checks)
-                uptime_percent = (successful / total) * 100 if total > 0 else 0
-
-                response_times = [
-                    check.response_time
-                    for check in day_checks
-                    if self._is_check_successful(check) and check.response_time
-                ]
-                avg_response_time = (
-                    sum(response_times) / len(response_times) if response_times else 0
-                )
-                # NOTE: Добавлять ли в статистику дни без проверок?
-                # else:
-                #     # uptime_percent = 0
-                #     # avg_response_time = 0
-                #     # total = 0
-
-                daily_stats.append(
-                    {
-                        "date": current_date,
-                        "uptime_percentage": round(uptime_percent, 1),
-                        "total_checks": total,
-                        "average_response_time": round(avg_response_time, 2),
-                    }
-                )
+        start_day = start_date.date()
+        end_day = end_date.date()
+
+        # NOTE: Добавлять ли в статистику дни без проверок?
+        # only days with checks are reported, so walk them instead of every day of the range
+        for day in sorted(day for day in daily_check_stats if start_day <= day <= end_day):
+            day_stats = daily_check_stats[day]
+            total = day_stats["total"]
+            uptime_percent = (day_stats["successful"] / total) * 100
+            response_times_count = day_stats["response_times_count"]
+            avg_response_time = (
+                day_stats["response_times_sum"] / response_times_count if response_times_count else 0
+            )
 
-            current_date += timedelta(days=1)
+            daily_stats.append(
+                {
+                    "date": day,
+                    "uptime_percentage": round(uptime_percent, 1),
+                    "total_checks": total,
+                    "average_response_time": round(avg_response_time, 2),
+                }
+            )
 
         return daily_stats
 
@@ -260,38 +270,38 @@ class ReportGenerator:
         Returns:
             str: Week report in Telegram message format.
         """
-        text = "📊 **Еженедельный отчет**\n\n"
-        text += f"🌐 **Сайт:** {report.url}\n"
-        text += f"📅 **Период:** {report.period_start.strftime('%d.%m.%Y')} "\
-            f"- {report.period_end.strftime('%d.%m.%Y')}\n\n"
-
         stats = report.stats
-        text += "📈 **Статистика:**\n"
-        text += f"• Uptime: {stats.uptime_percentage}%\n"
-        text += f"• Всего проверок: {stats.total_checks}\n"
-        text += f"• Успешных: {stats.successful_checks}\n"
-        text += f"• Неудачных: {stats.failed_checks}\n"
+        parts = [
+            "📊 **Еженедельный отчет**\n\n",
+            f"🌐 **Сайт:** {report.url}\n",
+            f"📅 **Период:** {report.period_start.strftime('%d.%m.%Y')} "
+            f"- {report.period_end.strftime('%d.%m.%Y')}\n\n",
+            "📈 **Статистика:**\n",
+            f"• Uptime: {stats.uptime_percentage}%\n",
+            f"• Всего проверок: {stats.total_checks}\n",
+            f"• Успешных: {stats.successful_checks}\n",
+            f"• Неудачных: {stats.failed_checks}\n",
+        ]
 
         if stats.downtime_duration > 0:
             downtime_str = format_duration(stats.downtime_duration)
-            text += f"• Время недоступности: {downtime_str}\n"
+            parts.append(f"• Время недоступности: {downtime_str}\n")
 
         if stats.average_response_time > 0:
-            text += f"• Среднее время ответа: {stats.average_response_time}ms\n"
+            parts.append(f"• Среднее время ответа: {stats.average_response_time}ms\n")
 
         if report.incidents:
-            text += f"\n🚨 **Инциденты ({len(report.incidents)}):**\n"
-            for i, incident in enumerate(
-                report.incidents[:5], 1
-            ):  # first 5 incidents only
-                duration_str = format_duration(incident["duration"])
-                text += f"{i}. {incident['start_time'].strftime('%d.%m %H:%M')} " \
-                    f"- {duration_str} ({incident['reason']})\n"
+            parts.append(f"\n🚨 **Инциденты ({len(report.incidents)}):**\n")
+            parts.extend(
+                f"{i}. {incident['start_time'].strftime('%d.%m %H:%M')} "
+                f"- {format_duration(incident['duration'])} ({incident['reason']})\n"
+                for i, incident in enumerate(report.incidents[:5], 1)  # first 5 incidents only
+            )
 
-        text += "\n📊 **Процент успешных проверок по дням:**\n"
-        text += self._create_text_chart(report.daily_stats)
+        parts.append("\n📊 **Процент успешных проверок по дням:**\n")
+        parts.append(self._create_text_chart(report.daily_stats))
 
-        return text
+        return "".join(parts)
 
     def _create_text_chart(self, daily_stats: list[dict]) -> str:
         """
@@ -303,27 +313,20 @@ class ReportGenerator:
         Returns:
             str: visual text form of the graph.
         """
-        chart = "\n"
+        lines = [""]
 
         for day_stat in daily_stats:
-            date_str = day_stat["date"].strftime("%d.%m")
             uptime = day_stat["uptime_percentage"]
-
-            green_count = int(uptime // 10)
-            red_count = 10 - green_count
-
-            chart += (
-                f"{date_str}: "
-                f"{'🟢' * green_count}{'🔴' * red_count} "
-                f"{uptime}%\n"
+            lines.append(
+                f"{day_stat['date'].strftime('%d.%m')}: "
+                f"{_UPTIME_BARS[int(uptime // 10)]} {uptime}%"
             )
 
-        return chart
+        lines.append("")
+        return "\n".join(lines)
 
 
 if __name__ == "__main__":
-    import asyncio
-
     g = ReportGenerator()
 
     print(
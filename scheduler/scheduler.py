@@ -1,4 +1,5 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from pymongo.errors import PyMongoError
 
 from constants import TICK_DURATION
 from db.db_handler import DBHandler
@@ -33,11 +34,11 @@ class Scheduler:
             list[str]: list of URLs.
         """
         self.ticks += 1
-        urls = await self._db.get_monitors_urls_for_tick(self.ticks * TICK_DURATION)
-        if urls is None:
-            self._logger.error("Error getting the url list for the current tick")
+        try:
+            return await self._db.get_monitors_urls_for_tick(self.ticks * TICK_DURATION)
+        except PyMongoError as exc:
+            self._logger.error("Error getting the url list for the current tick: %r", exc)
             return []
-        return urls
 
     async def _tick(self) -> None:
         """
@@ -6,7 +6,8 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     install_requires=[
         "apscheduler==3.11.0",
-        "httpx==0.28.1",
+        "cachetools==5.5.2",
+        "httpx[http2]==0.28.1",
         "pymongo==4.15.1",
         "python-dotenv==1.1.1",
         "python-telegram-bot==22.4",
@@ -1,15 +1,17 @@
-import asyncio
 import time
 
 from httpx import (
     AsyncClient,
     ConnectError,
-    ConnectTimeout,
     HTTPStatusError,
+    Limits,
+    PoolTimeout,
     Timeout,
+    TimeoutException,
+    TransportError,
 )
 
-from constants import REQUEST_TIMEOUT
+from constants import HTTP_MAX_CONNECTIONS, REQUEST_TIMEOUT, RESPONSE_TIMEOUT
 from task_manager.models import ResponseData, ResponseStatus
 from utils.decorators import Singleton
 from utils.meta import ExceptionHandlingMeta
@@ -21,9 +23,21 @@ class HTTPRequestor(metaclass=ExceptionHandlingMeta):
     A class for asynchronous http requests.
     """
 
+    # Called for every URL on every tick, errors are handled by TaskManager
+    _no_wrap = frozenset({"make_request"})
+
     def __init__(self):
-        timeout = Timeout(None, connect=REQUEST_TIMEOUT)
-        self._client = AsyncClient(timeout=timeout)
+        # every request holds a pool slot and a TaskManager semaphore slot,
+        # so a site that accepts the connection and never answers must not keep them forever
+        timeout = Timeout(RESPONSE_TIMEOUT, connect=REQUEST_TIMEOUT)
+        # Monitored hosts are re-contacted every tick, so keep their connections
+        # alive between ticks and multiplex requests over HTTP/2 where supported.
+        limits = Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=200,
+            keepalive_expiry=60.0,
+        )
+        self._client = AsyncClient(http2=True, timeout=timeout, limits=limits)
 
     async def make_request(self, url: str) -> ResponseData:
         """
@@ -35,20 +49,28 @@ class HTTPRequestor(metaclass=ExceptionHandlingMeta):
         Returns:
             ResponseData: object with data about response.
         """
-        start_time = asyncio.get_event_loop().time()
+        start_time = time.monotonic()
         timestamp = int(time.time())
         try:
             response = await self._client.get(url, follow_redirects=True)
-            response_time = asyncio.get_event_loop().time() - start_time
+            response_time = time.monotonic() - start_time
             response.raise_for_status()
         except ConnectError:
             return ResponseData(
                 url=url, status=ResponseStatus.DNS_ERROR, timestamp=timestamp
             )
-        except ConnectTimeout:
+        except PoolTimeout:
+            # no free connection in time, this says nothing about the site
+            raise
+        except TimeoutException:
             return ResponseData(
                 url=url, status=ResponseStatus.TIMEOUT, timestamp=timestamp
             )
+        except TransportError:
+            # the connection was lost or the response is broken
+            return ResponseData(
+                url=url, status=ResponseStatus.DNS_ERROR, timestamp=timestamp
+            )
         except HTTPStatusError:
             return ResponseData(
                 url=url,
@@ -1,7 +1,11 @@
 import asyncio
 
+from pymongo.errors import PyMongoError
+
+from constants import HTTP_MAX_CONNECTIONS
 from db.db_handler import DBHandler
 from task_manager import HTTPRequestor
+from task_manager.models import ResponseData
 from task_manager.service_status_manager import ServiceStatusManager
 from utils.log import get_logger
 
@@ -11,6 +15,21 @@ class TaskManager:
     _requestor = HTTPRequestor()
     _db = DBHandler()
     _status_manager = ServiceStatusManager()
+    # shared by overlapping ticks to keep in-flight requests within the HTTP pool
+    _requests_semaphore = asyncio.Semaphore(HTTP_MAX_CONNECTIONS)
+
+    async def _check_url(self, url: str) -> ResponseData:
+        """
+        Makes a request to the URL once a slot of the requests semaphore is free.
+
+        Args:
+            url (str): URL to check.
+
+        Returns:
+            ResponseData: response data.
+        """
+        async with self._requests_semaphore:
+            return await self._requestor.make_request(url)
 
     async def run_task(self, urls: list) -> None:
         """
@@ -19,23 +38,23 @@ class TaskManager:
         Args:
             urls (list): list of URLs.
         """
-        check_url_tasks = [self._requestor.make_request(url) for url in urls]
-        responses_data = await asyncio.gather(*check_url_tasks)
-
-        while None in responses_data:
-            idx = responses_data.index(None)
-            self._logger.warning("Error when making a request to the %s.", urls[idx])
-            responses_data.pop(idx)
-
-        add_checks_tasks = [
-            self._db.add_check_record(data.prepare_for_database())
-            for data in responses_data
-        ]
-        for i, check_id in enumerate(await asyncio.gather(*add_checks_tasks)):
-            if not check_id:
-                self._logger.warning("Error writing the check %s to the database.", responses_data[i].prepare_for_database())
-
-        update_sites_statuses_tasks = [
-            self._status_manager.process_check_result(data) for data in responses_data
-        ]
-        await asyncio.gather(*update_sites_statuses_tasks)
\ No newline at end of file
+        check_url_tasks = [self._check_url(url) for url in urls]
+        responses_data = []
+        for url, response_data in zip(
+            urls, await asyncio.gather(*check_url_tasks, return_exceptions=True)
+        ):
+            if isinstance(response_data, BaseException):
+                self._logger.warning("Error when making a request to the %s.", url, exc_info=response_data)
+            else:
+                responses_data.append(response_data)
+
+        checks = [data.prepare_for_database() for data in responses_data]
+        try:
+            await self._db.add_check_records(checks)
+        except PyMongoError as exc:
+            self._logger.warning("Error writing %d checks to the database: %r", len(checks), exc)
+
+        try:
+            await self._status_manager.process_check_results(responses_data)
+        except Exception:
+            self._logger.error("Error processing the check results.", exc_info=True)
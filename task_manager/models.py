@@ -1,9 +1,28 @@
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 
 from utils.enums import ResponseStatus, SiteStatus
 
-@dataclass
+
+@lru_cache(maxsize=128)
+def _timestamp_to_datetime(timestamp: int) -> datetime:
+    """
+    Converts a unix timestamp to a datetime.
+
+    Checks of one tick share a handful of whole-second timestamps,
+    so the conversion is cached to resolve the local time once per second.
+
+    Args:
+        timestamp (int): unix timestamp in seconds.
+
+    Returns:
+        datetime: local naive datetime for the timestamp.
+    """
+    return datetime.fromtimestamp(timestamp)
+
+
+@dataclass(slots=True)
 class ResponseData:
     """Response data model."""
 
@@ -23,7 +42,7 @@ class ResponseData:
         document = {
             "url": self.url,
             "status": self.status.value,
-            "timestamp": datetime.fromtimestamp(self.timestamp),
+            "timestamp": _timestamp_to_datetime(self.timestamp),
         }
         if self.code:
             document["code"] = self.code
@@ -31,7 +50,7 @@ class ResponseData:
             document["response_time"] = self.response_time
         return document
 
-@dataclass
+@dataclass(slots=True)
 class Notification:
     url: str
     status: SiteStatus
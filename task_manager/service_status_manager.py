@@ -1,3 +1,9 @@
+import asyncio
+import logging
+from weakref import WeakSet
+
+from cachetools import LRUCache
+
 from constants import FAILURE_THRESHOLD
 from db.db_handler import DBHandler
 from task_manager.models import ResponseData, Notification
@@ -6,6 +12,10 @@ from utils.decorators import Singleton
 from utils.enums import ResponseStatus, SiteStatus
 from utils.log import get_logger
 
+_OK = ResponseStatus.OK
+_AVAILABLE = SiteStatus.AVAILABLE
+_UNAVAILABLE = SiteStatus.UNAVAILABLE
+
 
 @Singleton
 class ServiceStatusManager:
@@ -14,72 +24,132 @@ class ServiceStatusManager:
     Decides on the availability or unavailability of the site and sends notifications to observers.
     """
 
+    __slots__ = ("db", "observers", "_observers_by_url", "_site_states", "_notify_semaphore")
     _logger = get_logger("ServiceStatusManager")
     def __init__(self):
         self.db = DBHandler()
-        self.observers: list[Observer] = []
+        # the subscription does not keep an observer alive
+        # observers of all sites
+        self.observers: WeakSet[Observer] = WeakSet()
+        # url -> observers of the site only
+        self._observers_by_url: dict[str, WeakSet[Observer]] = {}
+        # url -> (status, consecutive failures); the manager is the only writer of existing sites records,
+        # so the states are read from the database only for sites unseen yet
+        self._site_states: LRUCache[str, tuple[SiteStatus, int]] = LRUCache(maxsize=65536)
+        # limits the observers notified at once across all notifications
+        self._notify_semaphore = asyncio.Semaphore(32)
 
-    def subscribe(self, observer: Observer) -> None:
+    def subscribe(self, observer: Observer, url: str | None = None) -> None:
         """
         Subscribe observer to notifications.
+        The observer is held by a weak reference, so the caller keeps it alive.
 
         Args:
             observer (Observer): the object in which the notify method is implemented.
+            url (str, optional): URL of the site to get notifications about. Defaults to all sites.
         """
-        self.observers.append(observer)
+        if url is None:
+            self.observers.add(observer)
+        else:
+            self._observers_by_url.setdefault(url, WeakSet()).add(observer)
 
-    def unsubscribe(self, observer: Observer) -> None:
+    def unsubscribe(self, observer: Observer, url: str | None = None) -> None:
         """
         Unsubscribe observer from notifications
 
         Args:
             observer (Observer): the object that was subscribed.
+            url (str, optional): URL the observer was subscribed with. Defaults to all sites.
         """
-        if observer in self.observers:
-            self.observers.remove(observer)
+        if url is None:
+            self.observers.discard(observer)
+        elif (url_observers := self._observers_by_url.get(url)) is not None:
+            url_observers.discard(observer)
+            if not url_observers:
+                del self._observers_by_url[url]
 
-    async def _notify_observers(self, notification: Notification):
+    async def _safe_notify(self, observer: Observer, notification: Notification) -> None:
         """
-        Notifies all observers of an event.
+        Notifies one observer, logging its errors instead of raising them.
 
         Args:
+            observer (Observer): The subscribed observer.
             notification (Notification): The notification object, which means that the site has changed its status
         """
-        for observer in self.observers:
+        async with self._notify_semaphore:
+            try:
+                await observer.notify(notification)
+            except Exception:
+                self._logger.error(
+                    "Error notifying observer %s with %s", observer.name, notification, exc_info=True
+                )
+                return
+        if self._logger.isEnabledFor(logging.INFO):
             self._logger.info("Observer %s was notified with %s", observer.name, notification)
-            await observer.notify(notification)
 
-    async def process_check_result(self, check_info: ResponseData) -> None:
+    async def _notify_observers(self, notification: Notification):
+        """
+        Notifies the observers of all sites and of the notification site concurrently.
+
+        Args:
+            notification (Notification): The notification object, which means that the site has changed its status
+        """
+        async with asyncio.TaskGroup() as task_group:
+            for observer in {*self.observers, *self._observers_by_url.get(notification.url, ())}:
+                task_group.create_task(self._safe_notify(observer, notification))
+
+    async def process_check_results(self, checks_info: list[ResponseData]) -> None:
         """
-        Process the checking result and update the site availability status.
+        Process the results of several checks and update the sites availability statuses.
+        Sites states are kept in memory: only the sites without a known state are read from the database,
+        and only changed states are written, with one database request each. Notifications are sent afterwards.
 
         Args:
-            check_info (ResponseData): Information about request to URL.
+            checks_info (list[ResponseData]): Information about requests to URLs.
         """
-        site = await self.db.get_site(check_info.url)
-        if not site:
-            if not await self.db.add_site(check_info.url, SiteStatus.AVAILABLE.value):
-                self._logger.warning("Error writing the site %s to the database.", check_info.url)
+        if not checks_info:
+            return
+        states = self._site_states
+        if unknown_urls := [check_info.url for check_info in checks_info if check_info.url not in states]:
+            sites = await self.db.get_sites(unknown_urls)
+            if sites is None:
+                self._logger.warning("Error reading the sites of %d checks from the database.", len(checks_info))
                 return
-            site = await self.db.get_site(check_info.url)
+            for url, site in sites.items():
+                states[url] = (site.status, site.consecutive_failures)
 
-        current_status = site.status
-        failures = site.consecutive_failures
+        updates: dict[str, tuple[SiteStatus, int]] = {}
+        notifications = []
+        for check_info in checks_info:
+            url = check_info.url
+            if (state := states.get(url)) is None:
+                # the site record is created as available
+                state = updates[url] = (_AVAILABLE, 0)
+            current_status, failures = state
 
-        if check_info.status == ResponseStatus.OK:
-            if current_status == SiteStatus.UNAVAILABLE or failures > 0:
-                await self.db.update_site(check_info.url, SiteStatus.AVAILABLE.value, 0)
-                await self._notify_observers(Notification(check_info.url, SiteStatus.AVAILABLE))
-        else:
-            failures += 1
-            if failures >= FAILURE_THRESHOLD:
-                new_status = SiteStatus.UNAVAILABLE
+            if check_info.status is _OK:
+                if current_status is _UNAVAILABLE or failures > 0:
+                    state = updates[url] = (_AVAILABLE, 0)
+                    notifications.append(Notification(url, _AVAILABLE))
             else:
-                new_status = current_status
-            await self.db.update_site(check_info.url, new_status.value, failures)
-
-            if (
-                current_status == SiteStatus.AVAILABLE
-                and new_status == SiteStatus.UNAVAILABLE
-            ):
-                await self._notify_observers(Notification(check_info.url, SiteStatus.UNAVAILABLE))
+                failures += 1
+                if failures >= FAILURE_THRESHOLD:
+                    new_status = _UNAVAILABLE
+                else:
+                    new_status = current_status
+                state = updates[url] = (new_status, failures)
+
+                if (
+                    current_status is _AVAILABLE
+                    and new_status is _UNAVAILABLE
+                ):
+                    notifications.append(Notification(url, _UNAVAILABLE))
+            states[url] = state
+
+        if updates and not await self.db.update_sites(
+            [(url, status.value, failures) for url, (status, failures) in updates.items()]
+        ):
+            # the database keeps the previous states, they will be read again
+            for url in updates:
+                states.pop(url, None)
+        await asyncio.gather(*(self._notify_observers(notification) for notification in notifications))
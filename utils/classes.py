@@ -9,7 +9,17 @@ class Observer(ABC):
     This class serves as a base for all observer implementations.
     It defines the interface that must be implemented by concrete observers.
     """
-    
+
+    # the name of the observer class, set once for each subclass
+    name: str = "Observer"
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Stores the name of the observer class on the subclass.
+        """
+        super().__init_subclass__(**kwargs)
+        cls.name = cls.__name__
+
     @abstractmethod
     async def notify(self, notification: Any) -> Any:
         """
@@ -24,14 +34,4 @@ class Observer(ABC):
         Raises:
             NotImplementedError: If the method is not overridden in a subclass.
         """
-        pass
-
-    @property
-    def name(self) -> str:
-        """
-        Returns the name of the observer class.
-        
-        Returns:
-            str: The name of the observer class.
-        """
-        return type(self).__name__
\ No newline at end of file
+        pass
\ No newline at end of file
@@ -1,3 +1,8 @@
+import functools
+
+from cachetools import TTLCache
+
+
 def Singleton(cls):
     """
     Singleton decorator for classes.
@@ -10,3 +15,34 @@ def Singleton(cls):
         return instances[cls]
 
     return get_instance
+
+
+def async_ttl_cache(maxsize: int = 4096, ttl: float = 30.0):
+    """
+    LRU cache with expiring entries for async methods of singletons.
+
+    The cache key is built from the positional arguments except `self`.
+    The decorated method gets a `cache_pop(*args)` function to invalidate an entry.
+    Exceptions are not cached.
+
+    Args:
+        maxsize (int): Maximum number of cached results. Defaults to 4096.
+        ttl (float): Lifetime of a cached result in seconds. Defaults to 30.
+    """
+    def decorator(method):
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args):
+            try:
+                return cache[args]
+            except KeyError:
+                pass
+            result = await method(self, *args)
+            cache[args] = result
+            return result
+
+        wrapper.cache_pop = lambda *args: cache.pop(args, None)
+        return wrapper
+
+    return decorator
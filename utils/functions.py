@@ -1,3 +1,29 @@
+# Word forms by the last digit of a number: 0..9
+_PLURALS = {
+    "s": ("секунд", "секунда", "секунды", "секунды", "секунды", "секунд", "секунд", "секунд", "секунд", "секунд"),
+    "m": ("минут", "минута", "минуты", "минуты", "минуты", "минут", "минут", "минут", "минут", "минут"),
+    "h": ("часов", "час", "часа", "часа", "часа", "часов", "часов", "часов", "часов", "часов"),
+    "d": ("дней", "день", "дня", "дня", "дня", "дней", "дней", "дней", "дней", "дней"),
+}
+
+
+def _format_full_words(num: int, word: str) -> str:
+    """
+    Chooses the Russian word form for the number of time units.
+
+    Args:
+        num (int): Number of units.
+        word (str): Unit designation: "s", "m", "h" or "d".
+
+    Returns:
+        str: Word form agreed with the number.
+    """
+    forms = _PLURALS[word]
+    if 11 <= num % 100 <= 14:
+        return forms[0]
+    return forms[num % 10]
+
+
 def format_duration(seconds: int, full_words: bool = False) -> str:
     """
     Formats the duration into a readable format
@@ -10,55 +36,27 @@ def format_duration(seconds: int, full_words: bool = False) -> str:
     Returns:
         str: Human-readable time format.
     """
-    def format_full_words(num, word):
-        match word:
-            case "s":
-                if num%10 == 1:
-                    return "секунда"
-                if num%10 in range(2, 5):
-                    return "секунды"
-                return "секунд"
-            case "m":
-                if num%10 == 1:
-                    return "минута"
-                if num%10 in range(2, 5):
-                    return "минуты"
-                return "минут"
-            case "h":
-                if num%10 == 1:
-                    return "час"
-                if num%10 in range(2, 5):
-                    return "часа"
-                return "часов"
-            case "d":
-                if num%10 == 1:
-                    return "день"
-                if num%10 in range(2, 5):
-                    return "дня"
-                return "дней"
-        
-    if seconds < 60:
+    minutes, secs = divmod(seconds, 60)
+    if minutes == 0:
         if full_words:
-            return f"{seconds} {format_full_words(seconds, 's')}"
-        return f"{seconds}с"
-    if seconds < 3600:
+            return f"{secs} {_format_full_words(secs, 's')}"
+        return f"{secs}с"
+    hours, minutes = divmod(minutes, 60)
+    if hours == 0:
         if full_words:
-            if seconds%60 == 0:
-                return f"{seconds // 60} {format_full_words(seconds // 60, 'm')}"
-            return f"{seconds // 60} {format_full_words(seconds // 60, 'm')} {seconds % 60} {format_full_words(seconds, 's')}"
-        return f"{seconds // 60}м {seconds % 60}с"
-    if seconds < 86400:
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
+            if secs == 0:
+                return f"{minutes} {_format_full_words(minutes, 'm')}"
+            return f"{minutes} {_format_full_words(minutes, 'm')} {secs} {_format_full_words(secs, 's')}"
+        return f"{minutes}м {secs}с"
+    days, hours = divmod(hours, 24)
+    if days == 0:
         if full_words:
             if minutes == 0:
-                return f"{hours} {format_full_words(hours, 'h')}"
-            return f"{hours} {format_full_words(hours, 'h')} {minutes} {format_full_words(minutes, 'm')}"
+                return f"{hours} {_format_full_words(hours, 'h')}"
+            return f"{hours} {_format_full_words(hours, 'h')} {minutes} {_format_full_words(minutes, 'm')}"
         return f"{hours}ч {minutes}м"
-    days = seconds // 86400
-    hours = seconds % 86400
     if full_words:
         if hours == 0:
-            return f"{days} {format_full_words(days, 'd')}"
-        return f"{days} {format_full_words(days, 'd')} {hours} {format_full_words(hours, 'h')}"    
+            return f"{days} {_format_full_words(days, 'd')}"
+        return f"{days} {_format_full_words(days, 'd')} {hours} {_format_full_words(hours, 'h')}"
     return f"{days}д {hours}ч"
\ No newline at end of file
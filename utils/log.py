@@ -1,30 +1,54 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-from constants import LOGS_DIR
+from constants import LOG_LEVEL, LOGS_DIR
 
+LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
-def get_logger(name, level=logging.DEBUG) -> logging.Logger:
+# The format uses none of these record fields, so skip collecting them.
+# Without _srcfile the logging module does not walk the stack to find the caller of each record.
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging._srcfile = None  # pylint: disable=protected-access
+
+# Records are written to the files by a background thread, so logging does not block the event loop
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_listener = QueueListener(_log_queue, respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)
+
+
+def get_logger(name, level=LOG_LEVEL) -> logging.Logger:
     """
     Create and configure a RotatingFileHandler logger with the given name and log level.
-    Max bytes in one log file is 10 Mb
+    Max bytes in one log file is 10 Mb.
+    The logger puts records to a queue, the file is written by the background listener.
+    The file handler is added on the first call for the name only,
+    later calls just set the level of the logger.
 
     Args:
         name (str): The name of the logger.
-        level (int, optional): The log level for the logger. Defaults to logging.INFO.
+        level (int | str, optional): The log level for the logger.
+            Defaults to the LOG_LEVEL environment variable (INFO).
 
     Returns:
         logging.Logger: The configured logger.
 
     """
-    LOGS_DIR.mkdir(parents=True, exist_ok=True)
-    file_path = LOGS_DIR / f"{name}.log"
-    file_handler = RotatingFileHandler(file_path.as_posix(), maxBytes=10 * 1024 * 1024, backupCount=10)
-    file_handler.setFormatter(
-        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s [in %(pathname)s:%(lineno)d]")
-    )
-    file_handler.setLevel(level)
     logger = logging.getLogger(name)
-    logger.addHandler(file_handler)
+    if not logger.handlers:
+        file_path = LOGS_DIR / f"{name}.log"
+        file_handler = RotatingFileHandler(file_path.as_posix(), maxBytes=10 * 1024 * 1024, backupCount=10)
+        file_handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+        # the listener passes every record to all files, each file takes only its logger records
+        file_handler.addFilter(logging.Filter(name))
+        _listener.handlers += (file_handler,)
+        logger.addHandler(QueueHandler(_log_queue))
+    # records are filtered by the logger level only, so it can be changed by a later call
     logger.setLevel(level)
     return logger
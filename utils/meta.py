@@ -1,73 +1,121 @@
 import asyncio
+import functools
+import logging
+import time
 from types import FunctionType
+from typing import Callable
 
 from exceptions import MonitoringSystemException
 from utils.log import get_logger
 
+
+def _handle_exceptions(logger: logging.Logger) -> Callable[[FunctionType], FunctionType]:
+    """
+    Decorator factory that wraps a function with exception handling.
+
+    Errors are logged and the wrapped function returns None,
+    MonitoringSystemException is raised further.
+    An error of the same method is logged with its traceback at most once a second,
+    repeated errors within that second are skipped.
+
+    Args:
+        logger (logging.Logger): Logger for the errors.
+
+    Returns:
+        Callable[[FunctionType], FunctionType]: Decorator for sync and async functions.
+    """
+    # method name -> time of the last logged error
+    last_logged: dict[str, float] = {}
+
+    def log_error(method_name: str, exc: Exception) -> None:
+        """
+        Logs the error of the method, skipping it if an error of the method was logged less than a second ago.
+
+        Args:
+            method_name (str): Name of the failed method.
+            exc (Exception): Raised exception.
+        """
+        now = time.monotonic()
+        if now - last_logged.get(method_name, float("-inf")) < 1.0:
+            return
+        last_logged[method_name] = now
+        logger.error("An error has occurred in method %s:", method_name, exc_info=exc)
+
+    def decorator(original_method: FunctionType) -> FunctionType:
+        """
+        Creates a wrapper function for the original method.
+
+        Args:
+            original_method (FunctionType): Original method to wrap.
+
+        Returns:
+            FunctionType: Wrapped method with exception handling.
+        """
+        if asyncio.iscoroutinefunction(original_method):
+            @functools.wraps(original_method)
+            async def wrapper(*args, **kwargs):
+                """
+                Asynchronous wrapper for method execution.
+
+                Handles exceptions and logs errors.
+                """
+                try:
+                    return await original_method(*args, **kwargs)
+                except MonitoringSystemException as exc:
+                    raise exc from exc
+                except Exception as exc:
+                    log_error(original_method.__name__, exc)
+                    return
+        else:
+            @functools.wraps(original_method)
+            def wrapper(*args, **kwargs):
+                """
+                Synchronous wrapper for method execution.
+
+                Handles exceptions and logs errors.
+                """
+                try:
+                    return original_method(*args, **kwargs)
+                except MonitoringSystemException as exc:
+                    raise exc from exc
+                except Exception as exc:
+                    log_error(original_method.__name__, exc)
+                    return
+        return wrapper
+
+    return decorator
+
+
 class ExceptionHandlingMeta(type):
     """
-    Metaclass that automatically wraps all class methods (excluding `__init__`) with exception handling.
-    
-    Automatically adds try-except blocks to all methods of the class, logging errors
+    Metaclass that automatically wraps public class methods with exception handling.
+
+    Automatically adds try-except blocks to the public methods of the class, logging errors
     and handling MonitoringSystemException specifically.
+    Private methods (with a leading underscore) run as is, errors in them are handled
+    by the public methods calling them.
+    Methods listed in the `_no_wrap` class attribute are left as is; their callers handle errors.
     """
     def __new__(cls, name: str, bases: tuple, dct: dict) -> type:
         """
         Creates a new class with wrapped methods.
-        
+
         Args:
             name (str): Name of the class being created.
             bases (tuple): Tuple of base classes.
             dct (dict): Dictionary containing class attributes and methods.
-            
+
         Returns:
             type: New class with wrapped methods.
         """
-        logger = get_logger(name)
-        def create_wrapper(original_method: FunctionType, is_async: bool) -> FunctionType:
-            """
-            Creates a wrapper function for the original method.
-            
-            Args:
-                original_method (FunctionType): Original method to wrap.
-                is_async (bool): Flag indicating if the method is async.
-                
-            Returns:
-                FunctionType: Wrapped method with exception handling.
-            """
-            if is_async:
-                async def wrapper(*args, **kwargs):
-                    """
-                    Asynchronous wrapper for method execution.
-                    
-                    Handles exceptions and logs errors.
-                    """
-                    try:
-                        return await original_method(*args, **kwargs)
-                    except MonitoringSystemException as exc:
-                        raise exc from exc
-                    except Exception:
-                        logger.error("An error has occurred in method %s:", original_method.__name__, exc_info=True)
-                        return
-            else:
-                def wrapper(*args, **kwargs):
-                    """
-                    Synchronous wrapper for method execution.
-                    
-                    Handles exceptions and logs errors.
-                    """
-                    try:
-                        return original_method(*args, **kwargs)
-                    except MonitoringSystemException as exc:
-                        raise exc from exc
-                    except Exception:
-                        logger.error("An error has occurred in method %s:", original_method.__name__, exc_info=True)
-                        return
-            return wrapper
-        
+        wrap = _handle_exceptions(get_logger(name))
+        no_wrap = dct.get("_no_wrap", ())
         for attr_name, attr_value in dct.items():
-            if isinstance(attr_value, FunctionType) and attr_name != "__init__":
-                is_async = asyncio.iscoroutinefunction(attr_value)
-                dct[attr_name] = create_wrapper(attr_value, is_async)
-        
+            if (
+                isinstance(attr_value, FunctionType)
+                and not attr_name.startswith("_")
+                and attr_name not in no_wrap
+            ):
+                dct[attr_name] = wrap(attr_value)
+
         return super().__new__(cls, name, bases, dct)